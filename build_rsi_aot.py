@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Compilar de antemano (AOT) el núcleo del RSI con Numba
+
+Genera la extensión _rsi_aot (.so) en este directorio. utils.py la usa
+automáticamente si existe, evitando el calentamiento JIT de la primera
+llamada. Requiere numba instalado solo para compilar.
+
+Uso:
+    python build_rsi_aot.py
+"""
+
+from numba.pycc import CC
+
+from utils import _wilder_smooth_py, _rsi_core_py
+
+cc = CC('_rsi_aot')
+
+# Especializado para arrays float64 1-D y período entero
+cc.export('wilder_smooth', 'f8[:](f8[:], i8)')(_wilder_smooth_py)
+cc.export('rsi_core', 'f8(f8[:], i8)')(_rsi_core_py)
+
+if __name__ == "__main__":
+    cc.compile()
+    print("✅ Extensión _rsi_aot compilada")
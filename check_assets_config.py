@@ -7,11 +7,15 @@ Versión que usa las credenciales de config.py
 import time
 import sys
 from datetime import datetime
+import asyncio
 from iqoptionapi.stable_api import IQ_Option
 
+from iq_broker import BrokerClient
+from utils import cached_open_times, cached_update_opcodes, format_currency
+
 # Importar configuración
 try:
-    from config import IQ_EMAIL, IQ_PASSWORD, ACCOUNT_TYPE
+    from config import IQ_EMAIL, IQ_PASSWORD, ACCOUNT_TYPE, API_TIMEOUT
 except ImportError:
     print("❌ Error: No se pudo importar config.py")
     print("Asegúrate de que config.py esté en el mismo directorio")
@@ -51,13 +55,52 @@ KNOWN_MAPPINGS = {
     "XAGUSD": ["XAGUSD", "SILVER", "Silver"]
 }
 
+# Nombres candidatos de cada activo (con sufijos, en mayúsculas) -> prioridad
+# Internados para que las comparaciones con open_index sean por identidad
+_CANDIDATES = {
+    asset: {
+        name: rank
+        for rank, name in enumerate(dict.fromkeys(
+            sys.intern(f"{base_name}{suffix}".upper())
+            for base_name in KNOWN_MAPPINGS.get(asset, [asset])
+            for suffix in SUFFIXES
+        ))
+    }
+    for asset in TARGET_ASSETS
+}
+
+# Unión de todos los candidatos, para filtrar los activos en una sola pasada
+_ALL_CANDIDATES = frozenset().union(*_CANDIDATES.values())
+
+def wait_for_open_time(iq, timeout=API_TIMEOUT):
+    """
+    Obtener get_all_open_time() en cuanto venga poblado
+    
+    Reintenta con backoff exponencial (hasta 0.8s por espera) sin superar
+    el tiempo total indicado. Devuelve el último resultado obtenido.
+    """
+    deadline = time.time() + timeout
+    delay = 0.05
+    
+    while True:
+        all_assets = cached_open_times(iq)
+        if all_assets and any(all_assets.get(t) for t in ("binary", "turbo", "digital")):
+            return all_assets
+        
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return all_assets
+        
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 0.8)
+
 def check_assets():
     """Verificar disponibilidad de activos específicos"""
     
     print("="*80)
     print("🔍 VERIFICADOR DE ACTIVOS PARA IQ OPTION")
     print("="*80)
-    print(f"📅 Fecha/Hora: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"📅 Fecha/Hora: {datetime.now().isoformat(sep=' ', timespec='seconds')}")
     print(f"📧 Usuario: {IQ_EMAIL[:3]}***{IQ_EMAIL[-10:]}")
     print(f"💼 Cuenta: {ACCOUNT_TYPE}")
     print("="*80)
@@ -68,8 +111,13 @@ def check_assets():
         return
     
     # Conectar a IQ Option
-    print("\n🔗 Conectando a IQ Option...")
-    iq = IQ_Option(IQ_EMAIL, IQ_PASSWORD)
+    # Reutilizar la sesión del broker si está corriendo
+    if BrokerClient.available():
+        print("\n🔗 Conectando al broker de IQ Option...")
+        iq = BrokerClient()
+    else:
+        print("\n🔗 Conectando a IQ Option...")
+        iq = IQ_Option(IQ_EMAIL, IQ_PASSWORD)
     check, reason = iq.connect()
     
     if not check:
@@ -83,81 +131,52 @@ def check_assets():
     # Cambiar tipo de cuenta
     iq.change_balance(ACCOUNT_TYPE)
     balance = iq.get_balance()
-    print(f"💰 Balance: ${balance:,.2f}")
+    print(f"💰 Balance: {format_currency(balance)}")
     
     # Actualizar lista de activos
     print("\n📊 Obteniendo lista de activos...")
-    iq.update_ACTIVES_OPCODE()
-    time.sleep(1)
+    cached_update_opcodes(iq)
     
-    # Obtener todos los activos disponibles
-    all_assets = iq.get_all_open_time()
+    # Obtener todos los activos disponibles (en cuanto la lista esté lista)
+    all_assets = wait_for_open_time(iq)
     
     if not all_assets:
         print("❌ No se pudieron obtener los activos")
         return
     
-    # Resultados
-    results = {}
+    # Índice por tipo de opción: NOMBRE_EN_MAYÚSCULAS -> [(nombre real, abierto), ...]
+    # Una sola pasada sobre todos los activos, conservando solo los candidatos
+    open_index = {}
+    for option_type in ("binary", "turbo", "digital"):
+        if option_type not in all_assets:
+            continue
+        index = open_index[option_type] = {}
+        for name, data in all_assets[option_type].items():
+            key = sys.intern(name.upper())
+            if key in _ALL_CANDIDATES:
+                index.setdefault(key, []).append((name, data.get("open", False)))
     
-    print("\n🔍 BUSCANDO ACTIVOS OBJETIVO:")
-    print("-" * 80)
+    # El informe se acumula y se escribe en un solo write() al final
+    report = []
+    emit = report.append
     
-    # Buscar cada activo objetivo
-    for asset, description in TARGET_ASSETS.items():
-        results[asset] = {
-            'found': False,
-            'variants': [],
-            'description': description
-        }
-        
-        print(f"\n📌 {asset} - {description}:")
-        
-        # Obtener posibles nombres del mapeo conocido
-        possible_names = KNOWN_MAPPINGS.get(asset, [asset])
-        
-        # Agregar variantes con sufijos
-        names_to_check = []
-        for base_name in possible_names:
-            names_to_check.append(base_name)
-            for suffix in SUFFIXES:
-                names_to_check.append(f"{base_name}{suffix}")
-        
-        # Buscar en cada tipo de opción
-        for option_type in ["binary", "turbo", "digital"]:
-            if option_type not in all_assets:
-                continue
-            
-            # Buscar cada posible nombre
-            for name in names_to_check:
-                # Probar también en mayúsculas y minúsculas
-                for test_name in [name, name.upper(), name.lower()]:
-                    if test_name in all_assets[option_type]:
-                        is_open = all_assets[option_type][test_name].get("open", False)
-                        status = "✅ ABIERTO" if is_open else "❌ CERRADO"
-                        
-                        # Verificar si ya tenemos esta variante
-                        already_found = any(
-                            v['name'] == test_name and v['type'] == option_type 
-                            for v in results[asset]['variants']
-                        )
-                        
-                        if not already_found:
-                            variant_info = {
-                                'name': test_name,
-                                'type': option_type,
-                                'open': is_open
-                            }
-                            
-                            results[asset]['variants'].append(variant_info)
-                            results[asset]['found'] = True
-                            
-                            print(f"   ✓ Encontrado como '{test_name}' en {option_type}: {status}")
+    emit("\n🔍 BUSCANDO ACTIVOS OBJETIVO:")
+    emit("-" * 80)
+    
+    # Buscar cada activo objetivo en paralelo (el índice es de solo lectura)
+    results = asyncio.run(_match_all(open_index))
+    
+    # Mostrar resultados en el orden original
+    for asset, result in results.items():
+        emit(f"\n📌 {asset} - {result['description']}:")
+        for variant in result['variants']:
+            status = "✅ ABIERTO" if variant['open'] else "❌ CERRADO"
+            emit(f"   ✓ Encontrado como '{variant['name']}' en {variant['type']}: {status}")
     
     # Resumen por tipo de activo
-    print("\n" + "="*80)
-    print("📊 RESUMEN POR CATEGORÍA:")
-    print("="*80)
+    emit("\n" + "="*80)
+    emit("📊 RESUMEN POR CATEGORÍA:")
+    emit("="*80)
     
     # Categorizar activos
     forex_pairs = ["EURUSD", "GBPUSD", "USDJPY", "EURGBP", "AUDUSD", "EURJPY", "GBPJPY"]
@@ -166,26 +185,26 @@ def check_assets():
     stocks = ["APPLE", "MSFT"]
     
     # Mostrar por categoría
-    print("\n💱 FOREX:")
+    emit("\n💱 FOREX:")
     for asset in forex_pairs:
-        show_asset_status(asset, results)
+        show_asset_status(asset, results, emit)
     
-    print("\n📈 ÍNDICES:")
+    emit("\n📈 ÍNDICES:")
     for asset in indices:
-        show_asset_status(asset, results)
+        show_asset_status(asset, results, emit)
     
-    print("\n🏗️ COMMODITIES:")
+    emit("\n🏗️ COMMODITIES:")
     for asset in commodities:
-        show_asset_status(asset, results)
+        show_asset_status(asset, results, emit)
     
-    print("\n🏢 ACCIONES:")
+    emit("\n🏢 ACCIONES:")
     for asset in stocks:
-        show_asset_status(asset, results)
+        show_asset_status(asset, results, emit)
     
     # Resumen final
-    print("\n" + "="*80)
-    print("📊 RESUMEN FINAL:")
-    print("="*80)
+    emit("\n" + "="*80)
+    emit("📊 RESUMEN FINAL:")
+    emit("="*80)
     
     available_count = 0
     tradeable_assets = []
@@ -205,35 +224,79 @@ def check_assets():
                     'type': best['type']
                 })
     
-    print(f"\n✅ Activos disponibles para operar: {available_count}/{len(TARGET_ASSETS)}")
+    emit(f"\n✅ Activos disponibles para operar: {available_count}/{len(TARGET_ASSETS)}")
     
     if tradeable_assets:
-        print("\n📋 CONFIGURACIÓN SUGERIDA PARA STRATEGY:")
-        print("-" * 50)
-        print("TRADING_ASSETS = [")
+        emit("\n📋 CONFIGURACIÓN SUGERIDA PARA STRATEGY:")
+        emit("-" * 50)
+        emit("TRADING_ASSETS = (")
         for asset in tradeable_assets:
-            print(f'    "{asset["original"]}",  # IQ: {asset["iq_name"]} ({asset["type"]})')
-        print("]")
+            emit(f'    "{asset["original"]}",  # IQ: {asset["iq_name"]} ({asset["type"]})')
+        emit(")")
         
-        print("\n# Mapeo para IQ Option:")
-        print("ASSET_MAPPING = {")
+        emit("\n# Mapeo para IQ Option:")
+        emit("ASSET_MAPPING = {")
         for asset in tradeable_assets:
-            print(f'    "{asset["original"]}": "{asset["iq_name"]}",')
-        print("}")
+            emit(f'    "{asset["original"]}": "{asset["iq_name"]}",')
+        emit("}")
+    
+    emit("\n✅ Verificación completada")
+    
+    # Volcar todo el informe de una sola vez
+    sys.stdout.write("\n".join(report) + "\n")
+
+def _match_one(asset, description, open_index):
+    """Buscar todas las variantes de un activo en el índice de activos abiertos"""
+    result = {
+        'found': False,
+        'variants': [],
+        'description': description
+    }
+    
+    # Nombres candidatos precalculados en orden de prioridad
+    candidates = _CANDIDATES[asset]
+    bare_key = sys.intern(asset.upper())
     
-    print("\n✅ Verificación completada")
+    # Buscar en cada tipo de opción
+    for option_type, index in open_index.items():
+        if any(is_open for _, is_open in index.get(bare_key, ())):
+            # El nombre sin sufijo ya está abierto: alias y sufijos no aportan nada
+            hits = [bare_key]
+        else:
+            # Intersección directa con los nombres disponibles
+            hits = sorted(candidates.keys() & index.keys(), key=candidates.get)
+        
+        # Cada (nombre, tipo) aparece una sola vez en la API: no hace falta deduplicar
+        for key in hits:
+            for name, is_open in index[key]:
+                result['variants'].append({
+                    'name': name,
+                    'type': option_type,
+                    'open': is_open
+                })
+                result['found'] = True
+    
+    return result
+
+async def _match_all(open_index):
+    """Buscar todos los activos objetivo concurrentemente"""
+    matches = await asyncio.gather(*(
+        asyncio.to_thread(_match_one, asset, description, open_index)
+        for asset, description in TARGET_ASSETS.items()
+    ))
+    return dict(zip(TARGET_ASSETS, matches))
 
-def show_asset_status(asset, results):
-    """Mostrar estado de un activo específico"""
+def show_asset_status(asset, results, emit=print):
+    """Mostrar estado de un activo específico (emit recibe cada línea)"""
     if results[asset]['found']:
         open_variants = [v for v in results[asset]['variants'] if v['open']]
         if open_variants:
             best = open_variants[0]
-            print(f"   ✅ {asset}: '{best['name']}' ({best['type']})")
+            emit(f"   ✅ {asset}: '{best['name']}' ({best['type']})")
         else:
-            print(f"   ⚠️  {asset}: Encontrado pero cerrado")
+            emit(f"   ⚠️  {asset}: Encontrado pero cerrado")
     else:
-        print(f"   ❌ {asset}: No encontrado")
+        emit(f"   ❌ {asset}: No encontrado")
 
 def main():
     """Función principal"""
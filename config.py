@@ -1,13 +1,15 @@
 # config.py
 # Configuración de la estrategia RSI para IQ Option - Multi-Activos
 
+import os
+
 # Credenciales IQ Option
 IQ_EMAIL = "tu_correo"
 IQ_PASSWORD = "Tu_contraseña"  # Añadir tu contraseña aquí
 ACCOUNT_TYPE = "PRACTICE"  # "PRACTICE" o "REAL"
 
 # Lista de activos multi-mercado
-TRADING_ASSETS = [
+TRADING_ASSETS = (
     "US500",   # S&P 500 - El más confiable
     "EURUSD",  # Rey del Forex
     "GER30",   # DAX - Muy técnico
@@ -20,7 +22,7 @@ TRADING_ASSETS = [
     "JP225",   # Nikkei - Técnicamente limpio
     "EURJPY",  # Euro/Yen - Buenos rebotes      # La más técnica de las acciones     # Plata - Sigue al oro        # Microsoft - Tendencias claras
     "GBPJPY",  # Libra/Yen - Para más volatilidad
-]
+)
 
 # Mapeo OPCIONAL - Solo para casos especiales donde el nombre es muy diferente
 # Comenta o elimina las líneas de activos que quieres que busquen cualquier variante
@@ -51,7 +53,7 @@ MIN_TIME_BETWEEN_SIGNALS = 60  # Minutos entre señales del mismo activo (1 hora
 MAX_CONSECUTIVE_LOSSES = 999   # Prácticamente desactivado
 
 # Configuración de activos
-ALLOWED_ASSET_SUFFIXES = ["-OTC", "-op", ""]
+ALLOWED_ASSET_SUFFIXES = ("-OTC", "-op", "")
 PRIORITY_SUFFIX = None  # Sin prioridad - usa cualquier variante disponible
 
 # Modo de estrategia
@@ -63,10 +65,21 @@ LOG_FILE = "iqoption_strategy.log"
 
 # Configuración de caché y timeouts
 API_TIMEOUT = 10
+# Segundos antes de cada reintento de una orden, por motivo (una entrada por reintento)
+ORDER_RETRY_BACKOFF = {
+    "unavailable": (1.0,),  # Activo no disponible: se reintenta con una alternativa
+    "error": (2.0,),        # Excepción (conexión/timeout)
+}
 SAVE_STATE_INTERVAL = 30
 
 # Archivo de estado
 STATE_FILE = "strategy_state.json"
+EVENT_LOG_FILE = "strategy_events.ndjson"  # Resultados desde el último guardado completo
+
+# Broker de conexión compartida (iq_broker.py)
+# Directorio del usuario ($XDG_RUNTIME_DIR o el home), no /tmp: el socket expone buy
+BROKER_SOCKET = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or os.path.expanduser("~"), "iq_broker.sock")
+USE_IQ_BROKER = False  # True para que la estrategia use el broker en vez de su propia conexión
 
 # Configuración de debugging
 USE_POSITION_HISTORY = True
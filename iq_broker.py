@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Broker de IQ Option: mantiene una única sesión (websocket) abierta
+y la comparte con el resto de scripts a través de un socket UNIX local
+
+Uso:
+    python iq_broker.py          # Arrancar el broker (se queda en primer plano)
+
+Los clientes (check_assets_config.py, la estrategia con USE_IQ_BROKER)
+usan BrokerClient, que expone los mismos métodos que IQ_Option, así se
+evita un login y handshake por cada script.
+"""
+
+import os
+import sys
+import json
+import stat
+import socket
+import socketserver
+import threading
+import itertools
+
+from config import IQ_EMAIL, IQ_PASSWORD, ACCOUNT_TYPE, API_TIMEOUT, BROKER_SOCKET
+
+# Métodos de IQ_Option que el broker acepta ejecutar
+ALLOWED_OPS = frozenset({
+    "get_all_open_time", "update_ACTIVES_OPCODE", "get_all_ACTIVES_OPCODE",
+    "get_balance", "change_balance", "check_connect",
+    "get_candles", "start_candles_stream", "stop_candles_stream", "get_realtime_candles",
+    "buy", "get_async_order", "get_digital_spot_profit_after_sale",
+    "get_position_history", "get_position_history_v2", "get_optioninfo_v2",
+})
+
+# Métodos que se ejecutan de uno en uno sobre la sesión compartida: iqoptionapi
+# guarda su respuesta en un único hueco por sesión. Como en la estrategia
+# (MultiAssetRSIBinaryOptionsStrategy._serialized), buy tiene su propio lock
+# para no esperar detrás de las velas.
+SERIALIZED_OPS = {
+    "get_candles": "session",
+    "start_candles_stream": "session",
+    "buy": "order",
+}
+
+
+def _owned_socket(path):
+    """Indicar si `path` es un socket UNIX del usuario actual"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+
+def _broker_listening(path):
+    """Indicar si un broker acepta conexiones en `path`"""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+class _BrokerHandler(socketserver.StreamRequestHandler):
+    """Atender peticiones JSON (una por línea) de un cliente"""
+
+    def handle(self):
+        for line in self.rfile:
+            request_id = None
+            try:
+                request = json.loads(line)
+                request_id = request.get("id")
+                response = {"id": request_id, "ok": True, "result": self.server.broker.call(
+                    request["op"], request.get("args", []), request.get("kwargs", {})
+                )}
+            except Exception as e:
+                response = {"id": request_id, "ok": False, "error": str(e)}
+
+            self.wfile.write(json.dumps(response, default=str).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class _BrokerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class IQBroker:
+    """Proceso de larga duración que posee la única conexión a IQ Option"""
+
+    def __init__(self, email, password, account_type="PRACTICE", socket_path=BROKER_SOCKET):
+        self.email = email
+        self.password = password
+        self.account_type = account_type
+        self.socket_path = socket_path
+        self.iq = None
+        self._connect_lock = threading.Lock()
+        # Compartidos por todos los clientes (ver SERIALIZED_OPS)
+        self._op_locks = {"session": threading.Lock(), "order": threading.Lock()}
+
+    def connect(self):
+        """Conectar (o reconectar) la sesión compartida"""
+        from iqoptionapi.stable_api import IQ_Option
+
+        with self._connect_lock:
+            if self.iq is not None and self.iq.check_connect():
+                return
+
+            print("🔗 Conectando a IQ Option...")
+            iq = IQ_Option(self.email, self.password)
+            check, reason = iq.connect()
+            if not check:
+                raise Exception(f"Error al conectar a IQ Option: {reason}")
+
+            iq.change_balance(self.account_type)
+            self.iq = iq
+            print("✅ Conexión exitosa")
+
+    def call(self, op, args, kwargs):
+        """Ejecutar un método permitido de IQ_Option sobre la sesión compartida"""
+        if op not in ALLOWED_OPS:
+            raise ValueError(f"Operación no permitida: {op}")
+
+        if not self.iq.check_connect():
+            self.connect()
+
+        lock_name = SERIALIZED_OPS.get(op)
+        if lock_name is None:
+            return getattr(self.iq, op)(*args, **kwargs)
+        with self._op_locks[lock_name]:
+            return getattr(self.iq, op)(*args, **kwargs)
+
+    def serve_forever(self):
+        """Abrir el socket UNIX y atender clientes hasta Ctrl+C"""
+        if os.path.exists(self.socket_path):
+            # Solo se borra un socket huérfano (p. ej. tras un cierre inesperado)
+            if _broker_listening(self.socket_path):
+                raise RuntimeError(f"Ya hay un broker escuchando en {self.socket_path}")
+            os.remove(self.socket_path)
+
+        self.connect()
+
+        # Crear el socket ya con permisos de solo el usuario actual (expone buy)
+        old_umask = os.umask(0o177)
+        try:
+            server = _BrokerServer(self.socket_path, _BrokerHandler)
+        finally:
+            os.umask(old_umask)
+
+        with server:
+            server.broker = self
+            print(f"📡 Broker escuchando en {self.socket_path}")
+            try:
+                server.serve_forever()
+            finally:
+                os.remove(self.socket_path)
+
+
+class BrokerClient:
+    """
+    Cliente ligero con la misma interfaz que IQ_Option
+
+    Cada método se envía al broker como {"op", "args", "kwargs"}.
+    Los datos internos de la librería (iq.api) no se comparten.
+    """
+
+    api = None
+
+    def __init__(self, socket_path=BROKER_SOCKET, timeout=API_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    @staticmethod
+    def available(socket_path=BROKER_SOCKET):
+        """Indicar si hay un socket de broker del usuario actual"""
+        return _owned_socket(socket_path)
+
+    def connect(self):
+        """Abrir la conexión con el broker (mismo contrato que IQ_Option.connect)"""
+        try:
+            with self._lock:
+                self._open()
+        except Exception as e:
+            return False, f"Broker no disponible: {e}"
+        return self.check_connect(), None
+
+    def _open(self):
+        """Abrir (o reabrir) el socket con el broker (llamar con _lock)"""
+        self._close()
+        # Un socket de otro usuario recibiría las órdenes y podría falsear las respuestas
+        if not _owned_socket(self.socket_path):
+            raise ConnectionError(f"{self.socket_path} no es un socket del usuario actual")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except Exception:
+            sock.close()
+            raise
+        self._sock = sock
+        self._file = sock.makefile("rwb")
+
+    def _close(self):
+        """Cerrar el socket actual (llamar con _lock)"""
+        for resource in (self._file, self._sock):
+            if resource is not None:
+                try:
+                    resource.close()
+                except OSError:
+                    pass
+        self._sock = None
+        self._file = None
+
+    def _request(self, op, args, kwargs):
+        """
+        Enviar una petición y esperar su respuesta
+
+        Tras un timeout u otro error el stream queda inservible: se cierra y
+        la siguiente petición abre un socket nuevo. Cada petición lleva un
+        id y cualquier respuesta que no sea la suya se descarta.
+        """
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._open()
+
+                request_id = next(self._ids)
+                self._file.write(json.dumps(
+                    {"id": request_id, "op": op, "args": args, "kwargs": kwargs}
+                ).encode("utf-8") + b"\n")
+                self._file.flush()
+
+                while True:
+                    line = self._file.readline()
+                    if not line:
+                        raise ConnectionError("El broker cerró la conexión")
+                    response = json.loads(line)
+                    if response.get("id") == request_id:
+                        break
+            except Exception:
+                self._close()
+                raise
+
+        if not response["ok"]:
+            raise Exception(response["error"])
+        return response["result"]
+
+    def check_connect(self):
+        """Indicar si el broker responde y su sesión sigue conectada (False ante cualquier error)"""
+        try:
+            return bool(self._request("check_connect", [], {}))
+        except Exception:
+            return False
+
+    def __getattr__(self, op):
+        if op not in ALLOWED_OPS:
+            raise AttributeError(op)
+
+        def remote_call(*args, **kwargs):
+            return self._request(op, list(args), kwargs)
+
+        remote_call.__name__ = op
+        return remote_call
+
+
+def main():
+    """Función principal"""
+    if not IQ_EMAIL or IQ_EMAIL == "tu_email@example.com":
+        print("❌ ERROR: Por favor configura tus credenciales en config.py")
+        sys.exit(1)
+
+    try:
+        IQBroker(IQ_EMAIL, IQ_PASSWORD, ACCOUNT_TYPE).serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️ Broker detenido por el usuario")
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,45 @@
 # Punto de entrada principal para la estrategia RSI en IQ Option
 
 import sys
-import argparse
-import logging
+from types import SimpleNamespace
 from datetime import datetime
 
 from config import IQ_EMAIL, IQ_PASSWORD, ACCOUNT_TYPE, LOG_FILE
-from strategy import MultiAssetRSIBinaryOptionsStrategy
-from utils import setup_logger
 
-def main():
-    """Función principal para ejecutar la estrategia"""
+# Banner de inicio precompilado (las líneas con fecha y usuario se insertan en medio)
+SEPARATOR = "=" * 60
+BANNER_HEADER = "\n".join((
+    SEPARATOR,
+    "   ESTRATEGIA ALGEBRA MULTI-ACTIVOS PARA OPTION",
+    "   ⚡ LÓGICA INVERTIDA ⚡",
+    SEPARATOR,
+))
+BANNER_FOOTER = "\n".join((
+    SEPARATOR,
+    "⚠️ IMPORTANTE: Esta estrategia usa lógica INVERTIDA",
+    "   - PUT cuando RSI ≤ 35 (sobreventa)",
+    "   - CALL cuando RSI ≥ 65 (sobrecompra)",
+    SEPARATOR,
+))
+
+# Valores por defecto cuando no se pasan argumentos
+DEFAULT_ARGS = SimpleNamespace(
+    email=None,
+    password=None,
+    account=ACCOUNT_TYPE,
+    test=False,
+    debug_assets=False,
+    check_order=None,
+    check_recent=False,
+)
+
+def parse_args():
+    """Parsear argumentos de línea de comandos (argparse solo se importa si hay argumentos)"""
+    if len(sys.argv) <= 1:
+        return DEFAULT_ARGS
+    
+    import argparse
     
-    # Configurar argumentos de línea de comandos
     parser = argparse.ArgumentParser(description='Estrategia Algebra Multi-Activos para Option')
     parser.add_argument('--email', type=str, help='Email de IQ Option (sobrescribe config)')
     parser.add_argument('--password', type=str, help='Contraseña de IQ Option (sobrescribe config)')
@@ -27,7 +54,13 @@ def main():
     parser.add_argument('--check-recent', action='store_true',
                        help='Verificar resultados de órdenes recientes')
     
-    args = parser.parse_args()
+    return parser.parse_args()
+
+def main():
+    """Función principal para ejecutar la estrategia"""
+    
+    # Configurar argumentos de línea de comandos
+    args = parse_args()
     
     # Usar credenciales de argumentos o de config
     email = args.email or IQ_EMAIL
@@ -40,21 +73,21 @@ def main():
         print("Uso: python main.py --email tu_email@example.com --password tu_password")
         sys.exit(1)
     
+    # Importar la estrategia solo después de validar credenciales
+    import asyncio
+    from strategy import MultiAssetRSIBinaryOptionsStrategy
+    from utils import setup_logger, format_currency
+    
     # Configurar logger principal
     logger = setup_logger('main', LOG_FILE)
     
     # Banner de inicio
-    logger.info("=" * 60)
-    logger.info("   ESTRATEGIA ALGEBRA MULTI-ACTIVOS PARA OPTION")
-    logger.info("   ⚡ LÓGICA INVERTIDA ⚡")
-    logger.info("=" * 60)
-    logger.info(f"📅 Fecha/Hora: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    logger.info(f"📧 Usuario: {email[:3]}***{email[-10:]}")  # Ocultar parte del email
-    logger.info("=" * 60)
-    logger.info("⚠️ IMPORTANTE: Esta estrategia usa lógica INVERTIDA")
-    logger.info("   - PUT cuando RSI ≤ 35 (sobreventa)")
-    logger.info("   - CALL cuando RSI ≥ 65 (sobrecompra)")
-    logger.info("=" * 60)
+    logger.info("\n".join((
+        BANNER_HEADER,
+        f"📅 Fecha/Hora: {datetime.now().isoformat(sep=' ', timespec='seconds')}",
+        f"📧 Usuario: {email[:3]}***{email[-10:]}",  # Ocultar parte del email
+        BANNER_FOOTER,
+    )))
     
     try:
         # Crear e inicializar la estrategia
@@ -90,7 +123,7 @@ def main():
             # Modo prueba: verificar conexión y mostrar información
             logger.info("🧪 MODO PRUEBA - Verificando configuración...")
             logger.info(f"✅ Conexión exitosa")
-            logger.info(f"💰 Balance: ${strategy.initial_capital:,.2f}")
+            logger.info("💰 Balance: %s", format_currency(strategy.initial_capital))
             logger.info(f"📊 Activos disponibles: {len(strategy.valid_assets)}")
             if strategy.valid_assets:
                 logger.info("📋 Activos habilitados:")
@@ -107,13 +140,12 @@ def main():
         # Ejecutar estrategia
         logger.info("🎯 Iniciando operaciones...")
         logger.info("ℹ️ Presiona Ctrl+C para detener la estrategia")
-        strategy.run()
+        asyncio.run(strategy.run_async())
         
     except KeyboardInterrupt:
         logger.info("\n⏹️ Estrategia detenida por el usuario")
     except Exception as e:
-        logger.error(f"❌ Error fatal: {str(e)}")
-        logger.error("Traceback completo:", exc_info=True)
+        logger.exception("❌ Error fatal: %s", e)
         sys.exit(1)
     finally:
         logger.info("👋 Programa finalizado")
@@ -5,13 +5,15 @@ Borra todas las estadísticas acumuladas y permite empezar de cero
 """
 
 import os
-import json
 import shutil
 from datetime import datetime
 from pathlib import Path
 
+from utils import write_json_atomic, read_json_file, format_currency
+
 # Configuración
 STATE_FILE = "strategy_state.json"
+EVENT_LOG_FILE = "strategy_events.ndjson"
 LOG_FILE = "iqoption_strategy.log"
 BACKUP_DIR = "backups"
 
@@ -21,8 +23,7 @@ def load_current_state():
         return None
     
     try:
-        with open(STATE_FILE, 'r') as f:
-            return json.load(f)
+        return read_json_file(STATE_FILE)
     except Exception as e:
         print(f"❌ Error leyendo estado: {e}")
         return None
@@ -54,7 +55,7 @@ def show_current_statistics(state):
     
     # Profit
     total_profit = state.get('total_profit', 0)
-    print(f"\n💰 Beneficio total: ${total_profit:,.2f}")
+    print(f"\n💰 Beneficio total: {format_currency(total_profit)}")
     
     # Pérdidas consecutivas
     consecutive_losses = state.get('consecutive_losses', {})
@@ -85,12 +86,11 @@ def create_backup(state):
     
     # Nombre del archivo de backup
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_file = f"{BACKUP_DIR}/strategy_state_backup_{timestamp}.json"
+    backup_file = f"{BACKUP_DIR}/strategy_state_backup_{timestamp}.json.gz"
     
-    # Guardar backup
+    # Guardar backup (JSON compacto comprimido con gzip)
     try:
-        with open(backup_file, 'w') as f:
-            json.dump(state, f, indent=4)
+        write_json_atomic(backup_file, state, compress=True)
         print(f"\n💾 Backup creado: {backup_file}")
         return backup_file
     except Exception as e:
@@ -106,6 +106,11 @@ def reset_strategy():
         os.remove(STATE_FILE)
         print(f"✅ Archivo {STATE_FILE} eliminado")
     
+    # Eliminar registro de eventos (si no, se volvería a aplicar al cargar)
+    if os.path.exists(EVENT_LOG_FILE):
+        os.remove(EVENT_LOG_FILE)
+        print(f"✅ Archivo {EVENT_LOG_FILE} eliminado")
+    
     # Opcional: Limpiar log
     response = input("\n¿Deseas también limpiar el archivo de log? (s/N): ").lower()
     if response == 's':
@@ -8,16 +8,21 @@ import threading
 threading.excepthook = lambda args: None
 
 import time
-import json
+import asyncio
 import os
-from datetime import datetime, timedelta
+import heapq
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+from datetime import date, datetime, timedelta
 from collections import defaultdict
 import logging
-import pytz
-import traceback
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import numpy as np
+import re
+from functools import lru_cache, wraps
 
 from iqoptionapi.stable_api import IQ_Option
+from iq_broker import BrokerClient
 
 from config import (
     IQ_EMAIL, IQ_PASSWORD, ACCOUNT_TYPE, TRADING_ASSETS, ASSET_IQ_MAPPING,
@@ -25,10 +30,64 @@ from config import (
     ABSOLUTE_STOP_LOSS_PERCENT, MONTHLY_STOP_LOSS_PERCENT, POSITION_SIZE_PERCENT,
     MIN_POSITION_SIZE, MIN_TIME_BETWEEN_SIGNALS, MAX_CONSECUTIVE_LOSSES,
     ALLOWED_ASSET_SUFFIXES, PRIORITY_SUFFIX, STRATEGY_MODE, LOG_LEVEL, LOG_FILE,
-    API_TIMEOUT, SAVE_STATE_INTERVAL, STATE_FILE, USE_POSITION_HISTORY,
-    POSITION_HISTORY_TIMEOUT, DEBUG_ORDER_RESULTS
+    API_TIMEOUT, ORDER_RETRY_BACKOFF, SAVE_STATE_INTERVAL, STATE_FILE, EVENT_LOG_FILE, USE_POSITION_HISTORY,
+    POSITION_HISTORY_TIMEOUT, DEBUG_ORDER_RESULTS, USE_IQ_BROKER
 )
-from utils import calculate_rsi, is_market_open, format_currency, calculate_win_rate, setup_logger
+from utils import (
+    calculate_rsi, is_market_open, format_currency, calculate_win_rate, setup_logger,
+    wilder_averages, update_wilder_averages, rsi_from_averages, run_with_timeout,
+    write_json_atomic, read_json_file, json_dumps, json_loads
+)
+
+# Columnas de la tabla de estadísticas por activo (self.stats)
+STAT_WINS, STAT_LOSSES, STAT_TIES, STAT_STREAK = range(4)
+_STAT_KEYS = ("wins", "losses", "ties", "consecutive_losses")  # Claves en el archivo de estado
+
+# Errores al verificar una orden antes de darla por perdida
+_MAX_VERIFY_ERRORS = 3
+
+# Palabras clave de categoría para el listado de debug
+_CRYPTO_KEYWORDS = frozenset({"BTC", "ETH", "LTC", "XRP", "CRYPTO"})
+_COMMODITY_KEYWORDS = frozenset({"XAU", "XAG", "GOLD", "SILVER", "OIL", "GAS"})
+_INDICES_KEYWORDS = frozenset({"500", "100", "225", "30", "40", "NASDAQ", "DAX", "FTSE", "NIKKEI"})
+_CURRENCY_CODES = frozenset({"EUR", "USD", "GBP", "JPY", "AUD", "CAD", "CHF", "NZD"})
+
+def _keyword_re(keywords):
+    """Compilar un conjunto de palabras clave en una sola alternativa"""
+    return re.compile("|".join(map(re.escape, sorted(keywords))))
+
+# Patrones compilados a partir de los conjuntos, en orden de prioridad
+_CATEGORY_PATTERNS = (
+    ('crypto', _keyword_re(_CRYPTO_KEYWORDS)),
+    ('commodities', _keyword_re(_COMMODITY_KEYWORDS)),
+    ('indices', _keyword_re(_INDICES_KEYWORDS)),
+)
+_STOCK_RE = re.compile(r'#|-US|_US')
+_CURRENCY_RE = _keyword_re(_CURRENCY_CODES)
+
+def _categorize_asset(asset_name):
+    """Categoría de un activo según su nombre (por defecto commodities)"""
+    upper_name = asset_name.upper()
+    for category, pattern in _CATEGORY_PATTERNS:
+        if pattern.search(upper_name):
+            return category
+    if _STOCK_RE.search(asset_name):
+        return 'stocks'
+    if len(set(_CURRENCY_RE.findall(asset_name))) >= 2:
+        return 'forex'
+    return 'commodities'
+
+def _next_midnight_ts():
+    """Timestamp (time.time()) de la próxima medianoche local"""
+    tomorrow = date.today() + timedelta(days=1)
+    return datetime.combine(tomorrow, datetime.min.time()).timestamp()
+
+@lru_cache(maxsize=32)
+def _clock_time(moment, timespec="seconds"):
+    """Hora 'HH:MM[:SS]' de un datetime (las horas de bloqueo cambian una vez al día)"""
+    if moment is None:
+        return "N/A"
+    return moment.time().isoformat(timespec=timespec)
 
 class MultiAssetRSIBinaryOptionsStrategy:
     def __init__(self, email, password, account_type="PRACTICE"):
@@ -60,6 +119,17 @@ class MultiAssetRSIBinaryOptionsStrategy:
         # Parámetros de trading
         self.trading_assets = TRADING_ASSETS
         self.asset_mapping = ASSET_IQ_MAPPING
+        
+        # Variantes de nombre de los activos sin mapeo, calculadas una sola vez
+        # (_asset_variants: orden de búsqueda inicial; _alternatives: orden de recuperación)
+        self._asset_variants = {}
+        self._alternatives = {}
+        for asset in self.trading_assets:
+            if asset not in self.asset_mapping:
+                u = asset.upper()
+                self._asset_variants[asset] = (u, f"{u}-OTC", f"{u}-op")
+                self._alternatives[asset] = (f"{u}-OTC", u, f"{u}-op")
+        
         self.expiry_minutes = EXPIRY_MINUTES
         self.oversold_level = OVERSOLD_LEVEL
         self.overbought_level = OVERBOUGHT_LEVEL
@@ -69,9 +139,17 @@ class MultiAssetRSIBinaryOptionsStrategy:
         
         # Gestión de operaciones activas
         self.active_options = defaultdict(list)
-        self.last_signal_time = defaultdict(lambda: datetime.min)
-        self.consecutive_losses = defaultdict(int)
-        self.daily_lockouts = defaultdict(lambda: False)
+        # Cola de vencimientos: (timestamp de expiración, secuencia, activo, orden)
+        self._expiry_heap = []
+        self._expiry_seq = itertools.count()
+        self._stats_lock = threading.Lock()  # Protege contadores y profits entre hilos
+        self._orders_lock = threading.Lock()  # Protege active_options, la cola de vencimientos y last_signal_time
+        self._listinfo_index = {}  # Índice de api.listinfodata (ver _listinfodata_index)
+        self._listinfo_signature = None
+        self._listinfo_lock = threading.Lock()  # Los hilos de check_active_orders comparten el índice
+        # Última señal por activo en segundos de time.monotonic() (sin clave = nunca)
+        self.last_signal_time = {}
+        self.daily_lockouts = {}
         
         # Stop loss mensual
         self.monthly_stop_loss = False
@@ -79,13 +157,13 @@ class MultiAssetRSIBinaryOptionsStrategy:
         self.monthly_starting_capital = {}
         self.current_month = None
         
-        # Estadísticas de trading
-        self.wins = defaultdict(int)
-        self.losses = defaultdict(int)
-        self.ties = defaultdict(int)  # Contador de empates
+        # Estadísticas de trading: una fila por activo, columnas STAT_*
+        # (victorias, derrotas, empates, pérdidas consecutivas)
+        self.asset_idx = {asset: i for i, asset in enumerate(self.trading_assets)}
+        self.stats = np.zeros((len(self.asset_idx), len(_STAT_KEYS)), dtype=np.int64)
         self.total_profit = 0.0
         self.daily_profit = 0.0
-        self.monthly_profits = defaultdict(float)
+        self.monthly_profits = {}
         self.last_date = None
         self.min_capital = self.initial_capital
         
@@ -101,36 +179,72 @@ class MultiAssetRSIBinaryOptionsStrategy:
         self.max_daily_consecutive_losses = 3
         
         # Control de sistema
-        self.executor = ThreadPoolExecutor(max_workers=3)
         self.last_activity_time = time.time()
         self.start_time = time.time()
         
         # Período de calentamiento (1 hora sin operaciones)
         self.warmup_period = 3600  # 1 hora en segundos
         self.warmup_end_time = self.start_time + self.warmup_period
+        self._warmup_end_monotonic = time.monotonic() + self.warmup_period  # Para comparar en el bucle
         self.logger.info(f"⏳ Período de calentamiento activo por 1 hora")
-        self.logger.info(f"🕐 Primera operación posible a las: {datetime.fromtimestamp(self.warmup_end_time).strftime('%H:%M:%S')}")
+        self.logger.info(f"🕐 Primera operación posible a las: {datetime.fromtimestamp(self.warmup_end_time).time().isoformat(timespec='seconds')}")
         
         # Cache para optimización
         self.opcode_cache = {}
         self.opcode_cache_timestamp = 0
         self.asset_open_status_cache = {}
         self.asset_open_status_timestamp = 0
+        self.open_sets_cache = {}  # Tipo de opción -> nombres abiertos (derivado de la caché anterior)
+        self.open_sets_source = None
+        self._balance_cache = (0, None)  # (time.monotonic(), balance)
+        self._balance_lock = threading.Lock()
+        self._cached_month_key = None  # Ver _current_month_key
+        self._cached_month_epoch = 0  # Una sola consulta aunque varios activos la pidan a la vez
+        
+        # Velas del ciclo actual (obtenidas en lote) y streams abiertos
+        self.cycle_candles = {}
+        self.candle_streams = set()
+        self._stream_attempts = {}
+        self._candle_cache = {}  # (símbolo, timeframe, vela actual) -> (timestamp, count, velas)
+        self._candle_lock = threading.Lock()  # Lo comparten los hilos de poll_cycle
         
         # Mapeo de activos
         self.asset_option_types = {}
         self.iqoption_assets = {}
+        self.asset_routes = {}  # activo -> (nombre en IQ Option, tipo de opción)
         self.valid_assets = []
+        self.rsi_state = {}
+        
+        # Registro de resultados (append-only) desde el último guardado completo
+        self._event_seq = 0
+        self._state_hash = None  # Huella del último estado escrito (ver save_state)
         
         # Cargar estado previo si existe
         self.load_state()
         
+        # Escritor de estado en segundo plano (marcar con mark_state_dirty)
+        self._state_dirty = threading.Event()
+        self._state_write_lock = threading.Lock()
+        threading.Thread(target=self._state_writer_loop, daemon=True).start()
+        
+        # Pausa entre ciclos interrumpible (p. ej. cuando una orden queda lista para verificar)
+        self._wake = threading.Event()
+        
+        # Parada en curso (_finalize_run): corta las esperas largas y no deja colocar más órdenes
+        self._stopping = threading.Event()
+        
+        # Espera de los bloqueos diarios (on_new_day la libera) y su log periódico
+        self._unlock_event = threading.Event()
+        self._lock_log_timer = None
+        
         # Verificar si es un nuevo día al iniciar
-        current_date = datetime.now().date()
+        current_date = date.today()
         if self.last_date != current_date:
             self.logger.info(f"🌅 Detectado nuevo día al iniciar: {current_date}")
             self.on_new_day()
             self.last_date = current_date
+            self._unlock_event.clear()  # Nadie esperaba: no adelantar la primera espera
+        self._next_day_ts = _next_midnight_ts()
         
         # Validar activos disponibles
         self.check_valid_assets()
@@ -138,7 +252,19 @@ class MultiAssetRSIBinaryOptionsStrategy:
     def _connect_to_iq_option(self, email, password, account_type):
         """Conectar a IQ Option con manejo de errores"""
         self.logger.info("🔗 Conectando a IQ Option...")
-        self.iqoption = IQ_Option(email, password)
+        # Usar la sesión compartida del broker si está habilitado
+        if USE_IQ_BROKER:
+            self.iqoption = BrokerClient()
+        else:
+            self.iqoption = IQ_Option(email, password)
+        # Locks nuevos por sesión: una llamada colgada de la anterior no bloquea a esta
+        self._session_lock = threading.Lock()  # get_candles / start_candles_stream
+        self._order_lock = threading.Lock()  # buy (aparte: no espera detrás de las velas)
+        self.candle_streams = set()  # Los streams no sobreviven a una reconexión
+        self._stream_attempts = {}  # (nombre, timeframe) -> time.monotonic() del último intento
+        self.opcode_cache_timestamp = 0  # Nueva sesión: invalidar cachés
+        self.asset_open_status_timestamp = 0
+        self._invalidate_balance()
         login_status, login_reason = self.iqoption.connect()
         
         if not login_status:
@@ -152,41 +278,121 @@ class MultiAssetRSIBinaryOptionsStrategy:
         balance = self.iqoption.get_balance()
         self.logger.info(f"💰 Balance actual: {format_currency(balance)}")
     
-    def api_call_with_timeout(self, func, *args, timeout=API_TIMEOUT, **kwargs):
-        """Ejecutar llamada API con timeout"""
+    def api_call_with_timeout(self, func, *args, timeout=API_TIMEOUT, serialize=False, **kwargs):
+        """
+        Ejecutar llamada API con timeout
+        
+        serialize=True ejecuta la llamada bajo el lock de la sesión (ver _serialized).
+        """
         self.last_activity_time = time.time()
+        if serialize:
+            func = self._serialized(func, timeout)
         try:
-            future = self.executor.submit(func, *args, **kwargs)
-            result = future.result(timeout=timeout)
-            return result
-        except FutureTimeoutError:
+            return run_with_timeout(func, args, kwargs, timeout)
+        except TimeoutError:
             self.logger.error(f"⚠️ TIMEOUT: {func.__name__} tardó más de {timeout}s")
             return None
         except Exception as e:
             self.logger.error(f"❌ Error en {func.__name__}: {str(e)}")
             return None
     
+    def _serialized(self, func, timeout, lock=None):
+        """
+        Envolver una llamada para que corra bajo un lock de la sesión
+        
+        iqoptionapi guarda la respuesta de get_candles en un único hueco
+        compartido por toda la sesión: dos activos procesados a la vez pueden
+        llevarse cada uno las velas del otro. El lock se toma dentro del hilo
+        de la llamada, así una llamada abandonada por timeout lo retiene hasta
+        terminar y la siguiente no se solapa con ella. Por defecto se usa
+        _session_lock; place_option pasa _order_lock.
+        """
+        lock = lock or self._session_lock
+        
+        @wraps(func)
+        def call(*args, **kwargs):
+            if not lock.acquire(timeout=-1 if timeout is None else timeout):
+                raise TimeoutError(f"{func.__name__}: sesión ocupada más de {timeout}s")
+            try:
+                return func(*args, **kwargs)
+            finally:
+                lock.release()
+        return call
+    
+    def _get_all_open_time_cached(self, ttl=30):
+        """
+        Obtener get_all_open_time() reutilizando la última respuesta durante `ttl` segundos
+        
+        Usa asset_open_status_cache/asset_open_status_timestamp; solo se cachean
+        respuestas con datos. Consulta la sesión directamente y no pasa por
+        utils.cached_open_times: esa caché se indexa por id(iq), que no se
+        limpia al reconectar y puede reutilizar la siguiente sesión.
+        """
+        if self.asset_open_status_cache and time.time() - self.asset_open_status_timestamp < ttl:
+            return self.asset_open_status_cache
+        
+        all_assets = self.api_call_with_timeout(self.iqoption.get_all_open_time)
+        if all_assets and any(all_assets.get(t) for t in ("binary", "turbo", "digital")):
+            self.asset_open_status_cache = all_assets
+            self.asset_open_status_timestamp = time.time()
+        return all_assets
+    
+    def _open_sets_cached(self, ttl=30):
+        """
+        Conjuntos de nombres abiertos por tipo de opción
+        
+        Se reconstruyen solo cuando cambia la respuesta de get_all_open_time(),
+        así cada comprobación de disponibilidad es una búsqueda en un set.
+        """
+        all_assets = self._get_all_open_time_cached(ttl)
+        if not all_assets:
+            return {}
+        
+        if all_assets is not self.open_sets_source:
+            self.open_sets_cache = {
+                option_type: {name for name, data in assets.items() if data.get("open", False)}
+                for option_type, assets in all_assets.items()
+                if isinstance(assets, dict)
+            }
+            self.open_sets_source = all_assets
+        return self.open_sets_cache
+    
+    def _get_opcodes_cached(self, ttl=60):
+        """Obtener la tabla de opcodes de activos, actualizándola como máximo cada `ttl` segundos"""
+        if self.opcode_cache and time.time() - self.opcode_cache_timestamp < ttl:
+            return self.opcode_cache
+        
+        self.api_call_with_timeout(self.iqoption.update_ACTIVES_OPCODE)
+        opcodes = self.api_call_with_timeout(self.iqoption.get_all_ACTIVES_OPCODE)
+        if opcodes:
+            self.opcode_cache = opcodes
+            self.opcode_cache_timestamp = time.time()
+        return opcodes
+    
     def check_valid_assets(self):
         """Verificar qué activos están disponibles para operar"""
         self.logger.info("🔍 Verificando activos disponibles...")
         
         # Actualizar lista de activos
-        self.api_call_with_timeout(self.iqoption.update_ACTIVES_OPCODE)
-        opcodes = self.api_call_with_timeout(self.iqoption.get_all_ACTIVES_OPCODE)
+        opcodes = self._get_opcodes_cached()
         
         if not opcodes:
             self.logger.error("❌ No se pudieron obtener los activos disponibles")
             return []
         
-        # Obtener estado de activos
-        all_assets = self.api_call_with_timeout(self.iqoption.get_all_open_time)
-        if not all_assets:
+        # Obtener estado de activos (nombres abiertos por tipo de opción)
+        open_sets = self._open_sets_cached()
+        if not open_sets:
             self.logger.error("❌ No se pudo obtener el estado de los activos")
             return []
         
         self.valid_assets = []
         self.asset_option_types = {}
         self.iqoption_assets = {}
+        self.asset_routes = {}
+        
+        # Estado incremental del RSI: activo -> (avg_gain, avg_loss, último cierre, 'from' de la vela)
+        self.rsi_state = {}
         
         # Verificar cada activo
         for asset in self.trading_assets:
@@ -197,56 +403,41 @@ class MultiAssetRSIBinaryOptionsStrategy:
                 
                 # Buscar en opciones turbo y binarias (preferir binarias)
                 for option_type in ["binary", "turbo"]:
-                    if option_type not in all_assets:
-                        continue
-                    
-                    if iq_name in all_assets[option_type]:
-                        if all_assets[option_type][iq_name].get("open", False):
-                            self.valid_assets.append(asset)
-                            self.asset_option_types[asset] = option_type
-                            self.iqoption_assets[asset] = iq_name
-                            self.logger.info(f"✅ {asset}: Disponible como {iq_name} ({option_type})")
-                            found = True
-                            break
+                    if iq_name in open_sets.get(option_type, ()):
+                        self.valid_assets.append(asset)
+                        self._set_asset_route(asset, iq_name, option_type)
+                        self.logger.info(f"✅ {asset}: Disponible como {iq_name} ({option_type})")
+                        found = True
+                        break
                 
                 if not found:
                     self.logger.warning(f"⚠️ {asset}: No disponible ({iq_name})")
             else:
                 # Buscar variantes si no hay mapeo (compatibilidad con versión anterior)
-                asset_upper = asset.upper()
                 found = False
                 available_options = []
+                variants_to_check = self._asset_variants[asset]
                 
                 # Buscar en opciones turbo y binarias
                 for option_type in ["turbo", "binary"]:
-                    if option_type not in all_assets:
-                        continue
-                    
-                    # Lista de variantes a verificar
-                    variants_to_check = [
-                        asset_upper,
-                        f"{asset_upper}-OTC",
-                        f"{asset_upper}-op"
-                    ]
+                    open_names = open_sets.get(option_type, ())
                     
                     # Buscar cada variante
                     for variant in variants_to_check:
-                        if variant in all_assets[option_type]:
-                            if all_assets[option_type][variant].get("open", False):
-                                available_options.append({
-                                    'asset': asset,
-                                    'option_type': option_type,
-                                    'iq_name': variant,
-                                    'is_otc': variant.endswith('-OTC')
-                                })
-                                self.logger.info(f"✅ {asset}: Encontrado como {variant} ({option_type})")
+                        if variant in open_names:
+                            available_options.append({
+                                'asset': asset,
+                                'option_type': option_type,
+                                'iq_name': variant,
+                                'is_otc': variant.endswith('-OTC')
+                            })
+                            self.logger.info(f"✅ {asset}: Encontrado como {variant} ({option_type})")
                 
                 # Seleccionar la mejor opción disponible
                 if available_options:
                     best_option = available_options[0]  # Primera disponible
                     self.valid_assets.append(best_option['asset'])
-                    self.asset_option_types[best_option['asset']] = best_option['option_type']
-                    self.iqoption_assets[best_option['asset']] = best_option['iq_name']
+                    self._set_asset_route(best_option['asset'], best_option['iq_name'], best_option['option_type'])
                 else:
                     self.logger.warning(f"⚠️ {asset}: No disponible en ninguna variante")
         
@@ -259,13 +450,41 @@ class MultiAssetRSIBinaryOptionsStrategy:
         
         return self.valid_assets
     
+    def _set_asset_route(self, asset, iq_name, option_type):
+        """Registrar el nombre en IQ Option y el tipo de opción de un activo"""
+        self.iqoption_assets[asset] = iq_name
+        self.asset_option_types[asset] = option_type
+        self.asset_routes[asset] = (iq_name, option_type)  # Una sola búsqueda en los caminos calientes
+    
+    @staticmethod
+    def _normalize_position_history(history):
+        """
+        Extraer la lista de posiciones de la respuesta de get_position_history
+        
+        La librería devuelve una tupla (check, lista), un dict con 'positions'
+        o directamente una lista según la versión. A través del broker la
+        tupla llega como lista [check, lista] (JSON no tiene tuplas).
+        """
+        if isinstance(history, list) and len(history) == 2 and isinstance(history[0], bool):
+            history = tuple(history)
+        if isinstance(history, tuple):
+            for element in history:
+                if isinstance(element, list) and element:
+                    if isinstance(element[0], dict) and 'id' in element[0]:
+                        return element
+        elif isinstance(history, dict) and 'positions' in history:
+            return history['positions']
+        elif isinstance(history, list):
+            return history
+        return []
+    
     def test_check_order_result(self, order_id):
         """
         Método de prueba para verificar el resultado de una orden específica
         Útil para debugging
         """
-        self.logger.info(f"🔍 PRUEBA: Verificando orden {order_id}")
-        self.logger.info(f"   Tipo de ID: {type(order_id)}, Valor: {order_id}")
+        self.logger.info("🔍 PRUEBA: Verificando orden %s", order_id)
+        self.logger.info("   Tipo de ID: %s, Valor: %s", type(order_id), order_id)
         
         # Convertir a int si es necesario
         try:
@@ -277,10 +496,10 @@ class MultiAssetRSIBinaryOptionsStrategy:
         self.logger.info("📋 Método 1: get_async_order")
         result1 = self.api_call_with_timeout(self.iqoption.get_async_order, order_id, timeout=5)
         if result1:
-            self.logger.info(f"   Resultado: {result1}")
+            self.logger.info("   Resultado: %s", result1)
             if isinstance(result1, dict):
                 for key, value in result1.items():
-                    self.logger.info(f"   {key}: {value}")
+                    self.logger.info("   %s: %s", key, value)
         else:
             self.logger.info("   No se obtuvo resultado")
         
@@ -293,41 +512,31 @@ class MultiAssetRSIBinaryOptionsStrategy:
                 timeout=5
             )
             
-            positions = []
             if history:
-                # Manejar formato tupla
-                if isinstance(history, tuple):
-                    for element in history:
-                        if isinstance(element, list) and element:
-                            if isinstance(element[0], dict) and 'id' in element[0]:
-                                positions = element
-                                break
-                elif isinstance(history, dict) and 'positions' in history:
-                    positions = history['positions']
-                elif isinstance(history, list):
-                    positions = history
+                positions = self._normalize_position_history(history)
                 
-                found = False
-                for position in positions[:50]:  # Buscar en las últimas 50
-                    if str(position.get('id')) == str(order_id):
-                        found = True
-                        self.logger.info("   ✅ Orden encontrada en historial:")
-                        self.logger.info(f"   Status: {position.get('status')}")
-                        self.logger.info(f"   Win: {position.get('win')}")
-                        self.logger.info(f"   Amount: ${position.get('amount', 0):,.2f}")
-                        self.logger.info(f"   Win Amount: ${position.get('win_amount', 0):,.2f}")
-                        self.logger.info(f"   Created: {position.get('created')}")
-                        self.logger.info(f"   Expired: {position.get('expired')}")
-                        break
+                # Índice por ID para buscar la orden sin recorrer el historial
+                by_id = {str(p.get('id')): p for p in reversed(positions)}  # Gana la más reciente
+                position = by_id.get(str(order_id))
                 
-                if not found:
-                    self.logger.info("   ❌ Orden no encontrada en historial")
-                    # Mostrar algunas órdenes recientes para referencia
-                    self.logger.info("   📋 Últimas 3 órdenes en historial:")
-                    for i, pos in enumerate(positions[:3]):
-                        self.logger.info(f"      {i+1}. ID: {pos.get('id')}, Asset: {pos.get('active')}")
+                # Detalle de la orden (solo si se va a mostrar)
+                if self.logger.isEnabledFor(logging.INFO):
+                    if position is not None:
+                        self.logger.info("   ✅ Orden encontrada en historial:")
+                        self.logger.info("   Status: %s", position.get('status'))
+                        self.logger.info("   Win: %s", position.get('win'))
+                        self.logger.info("   Amount: %s", format_currency(position.get('amount', 0)))
+                        self.logger.info("   Win Amount: %s", format_currency(position.get('win_amount', 0)))
+                        self.logger.info("   Created: %s", position.get('created'))
+                        self.logger.info("   Expired: %s", position.get('expired'))
+                    else:
+                        self.logger.info("   ❌ Orden no encontrada en historial")
+                        # Mostrar algunas órdenes recientes para referencia
+                        self.logger.info("   📋 Últimas 3 órdenes en historial:")
+                        for i, pos in enumerate(positions[:3]):
+                            self.logger.info("      %s. ID: %s, Asset: %s", i + 1, pos.get('id'), pos.get('active'))
         except Exception as e:
-            self.logger.error(f"   Error buscando en historial: {str(e)}")
+            self.logger.error("   Error buscando en historial: %s", e)
         
         # Método 3: get_position_history_v2 si existe
         if hasattr(self.iqoption, 'get_position_history_v2'):
@@ -350,9 +559,9 @@ class MultiAssetRSIBinaryOptionsStrategy:
                     timeout=5
                 )
                 if history_v2:
-                    self.logger.info(f"   ✅ Funciona. Tipo: {type(history_v2)}")
+                    self.logger.info("   ✅ Funciona. Tipo: %s", type(history_v2))
             except Exception as e:
-                self.logger.info(f"   ❌ Error: {str(e)}")
+                self.logger.info("   ❌ Error: %s", e)
         
         return result1, None
     
@@ -361,12 +570,12 @@ class MultiAssetRSIBinaryOptionsStrategy:
         Verificar resultados de órdenes recientes para debugging
         Esto ayudará a identificar problemas con la detección de resultados
         """
-        self.logger.info(f"🔍 Verificando órdenes recientes...")
+        self.logger.info("🔍 Verificando órdenes recientes...")
         
         # Intentar obtener historial de órdenes
         try:
             # Método principal: get_position_history con sintaxis correcta
-            self.logger.info(f"📋 Obteniendo historial de posiciones...")
+            self.logger.info("📋 Obteniendo historial de posiciones...")
             history = self.api_call_with_timeout(
                 self.iqoption.get_position_history, 
                 "binary-option",  # Argumento requerido
@@ -375,61 +584,61 @@ class MultiAssetRSIBinaryOptionsStrategy:
             
             positions = []
             if history:
-                # Manejar formato tupla (formato real)
-                if isinstance(history, tuple):
-                    self.logger.info(f"✅ Historial obtenido (formato tupla)")
-                    for element in history:
-                        if isinstance(element, list) and element:
-                            if isinstance(element[0], dict) and 'id' in element[0]:
-                                positions = element
-                                break
-                # Manejar otros formatos
-                elif isinstance(history, dict) and 'positions' in history:
-                    positions = history['positions']
-                    self.logger.info(f"✅ Historial obtenido (formato dict)")
-                elif isinstance(history, list):
-                    positions = history
-                    self.logger.info(f"✅ Historial obtenido (formato lista)")
+                if isinstance(history, (tuple, dict, list)):
+                    self.logger.info("✅ Historial obtenido (formato %s)", type(history).__name__)
+                    positions = self._normalize_position_history(history)
                 else:
-                    self.logger.warning(f"⚠️ Formato desconocido: {type(history)}")
+                    self.logger.warning("⚠️ Formato desconocido: %s", type(history))
                 
                 if positions:
-                    self.logger.info(f"📊 Total de posiciones: {len(positions)}")
-                    self.logger.info(f"📋 Mostrando últimas 10 órdenes:")
+                    self.logger.info("📊 Total de posiciones: %s", len(positions))
                     
-                    for i, pos in enumerate(positions[:10]):
-                        win = pos.get('win', 'unknown')
-                        amount = pos.get('amount', 0)
-                        win_amount = pos.get('win_amount', 0)
+                    # Resumen y detalle de posiciones (solo si se va a mostrar)
+                    if self.logger.isEnabledFor(logging.INFO):
+                        # Clasificar todas las posiciones en una sola pasada local
+                        tally = defaultdict(int)
+                        for pos in positions:
+                            tally[pos.get('win', 'unknown')] += 1
+                        self.logger.info(
+                            f"📊 Resultados: {tally['win']}W/{tally['loose']}L/{tally['equal']}T"
+                            f" ({len(positions) - tally['win'] - tally['loose'] - tally['equal']} sin resultado)"
+                        )
                         
-                        # Determinar emoji y resultado
-                        if win == 'win':
-                            emoji = "✅"
-                            result = f"+${win_amount - amount:.2f}"
-                        elif win == 'loose':
-                            emoji = "❌"
-                            result = f"-${amount:.2f}"
-                        elif win == 'equal':
-                            emoji = "🟡"
-                            result = "$0"
-                        else:
-                            emoji = "❓"
-                            result = "?"
+                        self.logger.info("📋 Mostrando últimas 10 órdenes:")
                         
-                        self.logger.info(f"\n   Orden {i+1}: {emoji}")
-                        self.logger.info(f"   ID: {pos.get('id')}")
-                        self.logger.info(f"   Asset: {pos.get('active')}")
-                        self.logger.info(f"   Direction: {pos.get('direction')}")
-                        self.logger.info(f"   Amount: ${amount:,.2f}")
-                        self.logger.info(f"   Result: {result}")
-                        self.logger.info(f"   Created: {pos.get('created')}")
+                        for i, pos in enumerate(positions[:10]):
+                            win = pos.get('win', 'unknown')
+                            amount = pos.get('amount', 0)
+                            win_amount = pos.get('win_amount', 0)
+                            
+                            # Determinar emoji y resultado
+                            if win == 'win':
+                                emoji = "✅"
+                                result = "+" + format_currency(win_amount - amount)
+                            elif win == 'loose':
+                                emoji = "❌"
+                                result = "-" + format_currency(amount)
+                            elif win == 'equal':
+                                emoji = "🟡"
+                                result = "$0"
+                            else:
+                                emoji = "❓"
+                                result = "?"
+                            
+                            self.logger.info("\n   Orden %s: %s", i + 1, emoji)
+                            self.logger.info("   ID: %s", pos.get('id'))
+                            self.logger.info("   Asset: %s", pos.get('active'))
+                            self.logger.info("   Direction: %s", pos.get('direction'))
+                            self.logger.info("   Amount: %s", format_currency(amount))
+                            self.logger.info("   Result: %s", result)
+                            self.logger.info("   Created: %s", pos.get('created'))
                 else:
                     self.logger.info("❌ No se encontraron posiciones")
             else:
                 self.logger.info("❌ No se pudo obtener historial")
                 
-            # Método alternativo: get_position_history_v2
-            if hasattr(self.iqoption, 'get_position_history_v2'):
+            # Método alternativo: get_position_history_v2 (solo si el principal no devolvió posiciones)
+            if not positions and hasattr(self.iqoption, 'get_position_history_v2'):
                 self.logger.info("\n📋 Probando get_position_history_v2...")
                 try:
                     import time as time_module
@@ -448,13 +657,12 @@ class MultiAssetRSIBinaryOptionsStrategy:
                         timeout=5
                     )
                     if history_v2:
-                        self.logger.info(f"✅ get_position_history_v2 funciona")
+                        self.logger.info("✅ get_position_history_v2 funciona")
                 except Exception as e:
-                    self.logger.info(f"❌ get_position_history_v2 falló: {str(e)}")
+                    self.logger.info("❌ get_position_history_v2 falló: %s", e)
                     
         except Exception as e:
-            self.logger.error(f"❌ Error obteniendo historial: {str(e)}")
-            self.logger.error(f"Detalles: {traceback.format_exc()}")
+            self.logger.exception("❌ Error obteniendo historial: %s", e)
     
     def debug_show_all_available_assets(self):
         """
@@ -466,7 +674,7 @@ class MultiAssetRSIBinaryOptionsStrategy:
         self.logger.info("="*60)
         
         # Obtener todos los activos
-        all_assets = self.api_call_with_timeout(self.iqoption.get_all_open_time)
+        all_assets = self._get_all_open_time_cached()
         if not all_assets:
             self.logger.error("❌ No se pudieron obtener los activos")
             return
@@ -492,34 +700,7 @@ class MultiAssetRSIBinaryOptionsStrategy:
             
             for asset_name, asset_data in all_assets[option_type].items():
                 if asset_data.get("open", False):
-                    # Categorizar
-                    currency_codes = ["EUR", "USD", "GBP", "JPY", "AUD", "CAD", "CHF", "NZD"]
-                    indices_keywords = ["500", "100", "225", "30", "40", "NASDAQ", "DAX", "FTSE", "NIKKEI"]
-                    commodity_keywords = ["XAU", "XAG", "GOLD", "SILVER", "OIL", "GAS"]
-                    crypto_keywords = ["BTC", "ETH", "LTC", "XRP", "CRYPTO"]
-                    
-                    categorized = False
-                    
-                    # Detectar categoría
-                    if any(keyword in asset_name.upper() for keyword in crypto_keywords):
-                        categories['crypto'].append((asset_name, option_type))
-                        categorized = True
-                    elif any(keyword in asset_name.upper() for keyword in commodity_keywords):
-                        categories['commodities'].append((asset_name, option_type))
-                        categorized = True
-                    elif any(keyword in asset_name.upper() for keyword in indices_keywords):
-                        categories['indices'].append((asset_name, option_type))
-                        categorized = True
-                    elif "#" in asset_name or "-US" in asset_name or "_US" in asset_name:
-                        categories['stocks'].append((asset_name, option_type))
-                        categorized = True
-                    elif sum(1 for curr in currency_codes if curr in asset_name) >= 2:
-                        categories['forex'].append((asset_name, option_type))
-                        categorized = True
-                    
-                    # Si no se categorizó, ponerlo en commodities
-                    if not categorized:
-                        categories['commodities'].append((asset_name, option_type))
+                    categories[_categorize_asset(asset_name)].append((asset_name, option_type))
         
         # Mostrar por categorías
         category_names = {
@@ -568,7 +749,7 @@ class MultiAssetRSIBinaryOptionsStrategy:
         Útil para detectar activos que aparecen abiertos pero están suspendidos
         """
         try:
-            asset_name = self.iqoption_assets[asset]
+            asset_name, option_type = self.asset_routes[asset]
             
             # Intentar obtener el profit del activo
             profit = self.api_call_with_timeout(
@@ -580,14 +761,7 @@ class MultiAssetRSIBinaryOptionsStrategy:
                 return True
             
             # Si no hay profit, verificar de otra manera
-            all_assets = self.api_call_with_timeout(self.iqoption.get_all_open_time)
-            option_type = self.asset_option_types[asset]
-            
-            if all_assets and option_type in all_assets:
-                if asset_name in all_assets[option_type]:
-                    return all_assets[option_type][asset_name].get("open", False)
-            
-            return False
+            return asset_name in self._open_sets_cached().get(option_type, ())
             
         except Exception as e:
             self.logger.debug(f"Error verificando {asset}: {str(e)}")
@@ -604,8 +778,8 @@ class MultiAssetRSIBinaryOptionsStrategy:
             self.logger.info(f"🔄 Buscando alternativa para {asset}...")
             
             # Obtener estado actual de activos
-            all_assets = self.api_call_with_timeout(self.iqoption.get_all_open_time)
-            if not all_assets:
+            open_sets = self._open_sets_cached()
+            if not open_sets:
                 return False
             
             current_asset = self.iqoption_assets[asset]
@@ -617,27 +791,17 @@ class MultiAssetRSIBinaryOptionsStrategy:
                     self.valid_assets.remove(asset)
                 return False
             
-            # Para otros activos, buscar alternativas
-            asset_upper = asset.upper()
-            alternatives = [
-                f"{asset_upper}-OTC",
-                asset_upper,
-                f"{asset_upper}-op"
-            ]
-            
-            # Quitar el activo actual de las alternativas
-            alternatives = [alt for alt in alternatives if alt != current_asset]
-            
-            # Buscar una alternativa funcional
-            for alt_asset in alternatives:
+            # Buscar una alternativa funcional (distinta del activo actual)
+            for alt_asset in self._alternatives[asset]:
+                if alt_asset == current_asset:
+                    continue
                 for option_type in ["binary", "turbo"]:
-                    if option_type in all_assets and alt_asset in all_assets[option_type]:
-                        if all_assets[option_type][alt_asset].get("open", False):
-                            # Actualizar a la alternativa
-                            self.logger.info(f"✅ Cambiando {asset} de {current_asset} a {alt_asset} ({option_type})")
-                            self.iqoption_assets[asset] = alt_asset
-                            self.asset_option_types[asset] = option_type
-                            return True
+                    if alt_asset in open_sets.get(option_type, ()):
+                        # Actualizar a la alternativa
+                        self.logger.info(f"✅ Cambiando {asset} de {current_asset} a {alt_asset} ({option_type})")
+                        self._set_asset_route(asset, alt_asset, option_type)
+                        self.rsi_state.pop(asset, None)  # Otra serie de precios
+                        return True
             
             # Si no hay alternativas, eliminar el activo temporalmente
             self.logger.warning(f"❌ No hay alternativas disponibles para {asset}, eliminándolo temporalmente")
@@ -647,9 +811,34 @@ class MultiAssetRSIBinaryOptionsStrategy:
         
         return True
     
+    def _get_balance_cached(self, ttl=2.0):
+        """
+        Obtener el balance reutilizando la última lectura durante `ttl` segundos
+        
+        ttl=0 fuerza una consulta real (p. ej. justo antes de colocar una orden).
+        """
+        timestamp, balance = self._balance_cache
+        if balance is not None and time.monotonic() - timestamp < ttl:
+            return balance
+        
+        with self._balance_lock:
+            # Otro hilo pudo refrescarlo mientras esperábamos el lock
+            timestamp, balance = self._balance_cache
+            if balance is not None and ttl > 0 and time.monotonic() - timestamp < ttl:
+                return balance
+            
+            balance = self.api_call_with_timeout(self.iqoption.get_balance)
+            if balance is not None:
+                self._balance_cache = (time.monotonic(), balance)
+            return balance
+    
+    def _invalidate_balance(self):
+        """Descartar el balance cacheado (tras una orden o un resultado)"""
+        self._balance_cache = (0, None)
+    
     def calculate_position_size(self):
         """Calcular tamaño de posición basado en el capital actual (2.5% sin límite máximo)"""
-        current_capital = self.api_call_with_timeout(self.iqoption.get_balance)
+        current_capital = self._get_balance_cached()
         if current_capital is None:
             current_capital = self.initial_capital
         
@@ -659,24 +848,75 @@ class MultiAssetRSIBinaryOptionsStrategy:
         # Solo aplicar límite mínimo (no hay límite máximo)
         position_size = max(self.min_position_size, position_size)
         
-        self.logger.debug(f"💰 Capital: ${current_capital:,.2f} → Posición: ${position_size:,.2f} ({self.position_size_percent*100}%)")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "💰 Capital: %s → Posición: %s (%s%%)",
+                format_currency(current_capital), format_currency(position_size), self.position_size_percent * 100
+            )
         
         return position_size
     
+    def fetch_candles_batch(self, assets, timeframe, count):
+        """
+        Obtener velas de varios activos en una sola pasada
+        
+        Abre una sola vez el stream de velas de cada activo y luego lee las
+        velas en tiempo real de todos los activos localmente, sin un
+        round-trip a IQ Option por activo en cada ciclo. Un stream solo se
+        da por abierto cuando ya entrega velas; si la suscripción falló o
+        expiró se vuelve a pedir, como mucho una vez por vela (`timeframe`
+        segundos), para que los activos sin datos no retrasen cada ciclo.
+        
+        Returns:
+            dict: activo -> lista de velas ordenadas por tiempo
+        """
+        # Nombres en IQ Option, resueltos una sola vez para los dos recorridos
+        routes = self.asset_routes
+        names = [(asset, routes[asset][0]) for asset in assets]
+        
+        # Abrir los streams que aún no existan (sin repetir el intento dentro de la misma vela)
+        now = time.monotonic()
+        for asset, iq_name in names:
+            stream = (iq_name, timeframe)
+            if stream not in self.candle_streams and now - self._stream_attempts.get(stream, float('-inf')) >= timeframe:
+                self._stream_attempts[stream] = now
+                self.api_call_with_timeout(
+                    self.iqoption.start_candles_stream, stream[0], timeframe, count, serialize=True
+                )
+        
+        # Leer todas las velas localmente
+        batch = {}
+        for asset, iq_name in names:
+            try:
+                # Copia del dict vivo: el hilo del websocket añade y descarta velas
+                candles = dict(self.iqoption.get_realtime_candles(iq_name, timeframe) or {})
+            except Exception as e:
+                self.logger.debug(f"Sin velas en tiempo real para {asset}: {str(e)}")
+                continue
+            
+            if candles:
+                self.candle_streams.add((iq_name, timeframe))
+                batch[asset] = [candles[ts] for ts in sorted(candles)][-count:]
+        
+        return batch
+    
     def get_rsi(self, asset):
         """Obtener RSI para un activo específico usando velas de 5 minutos"""
         try:
-            # Asegurarnos de usar timeframe de 5 minutos (300 segundos)
-            candles = self.api_call_with_timeout(
-                self.iqoption.get_candles,
-                self.iqoption_assets[asset],
-                300,  # 5 minutos
-                100,
-                time.time()
-            )
+            # Usar las velas del lote del ciclo si están disponibles
+            candles = self.cycle_candles.get(asset)
             
-            if candles and len(candles) >= self.rsi_period:
-                rsi = calculate_rsi(candles, self.rsi_period)
+            if not candles:
+                # Con estado de Wilder bastan las últimas velas; sin él, la ventana completa
+                if asset in self.rsi_state:
+                    candles = self._fetch_candles(asset, 3)
+                    if not self._continues_rsi_state(asset, candles):
+                        candles = self._fetch_candles(asset, 100)
+                else:
+                    candles = self._fetch_candles(asset, 100)
+            
+            if candles and (len(candles) >= self.rsi_period or self._continues_rsi_state(asset, candles)):
+                rsi = self._incremental_rsi(asset, candles)
                 if rsi is not None:
                     self.logger.debug(f"📊 {asset} - RSI(5min): {rsi:.2f}")
                 return rsi
@@ -688,25 +928,142 @@ class MultiAssetRSIBinaryOptionsStrategy:
             self.logger.error(f"❌ Error obteniendo RSI para {asset}: {str(e)}")
             return None
     
+    def _fetch_candles(self, asset, count, timeframe=300, ttl=5):
+        """
+        Obtener las últimas `count` velas de 5 minutos (300 segundos) de un activo
+        
+        Las respuestas se reutilizan durante `ttl` segundos dentro de la misma
+        vela: los activos que comparten símbolo y las consultas de menos velas
+        (p. ej. 3 tras 100) no vuelven a la red. El TTL es corto porque la
+        última vela sigue cambiando hasta que cierra.
+        """
+        symbol = self.asset_routes[asset][0]
+        now = time.time()
+        bar_id = int(now // timeframe)
+        key = (symbol, timeframe, bar_id)
+        
+        with self._candle_lock:
+            entry = self._candle_cache.get(key)
+        if entry and now - entry[0] < ttl and entry[1] >= count:
+            return entry[2][-count:]
+        
+        candles = self.api_call_with_timeout(
+            self.iqoption.get_candles,
+            symbol,
+            timeframe,
+            count,
+            now,
+            serialize=True
+        )
+        
+        if candles:
+            with self._candle_lock:
+                # Al cambiar de vela las entradas anteriores ya no sirven
+                for old_key in [k for k in self._candle_cache if k[2] != bar_id]:
+                    del self._candle_cache[old_key]
+                self._candle_cache[key] = (now, count, candles)
+        return candles
+    
+    def _continues_rsi_state(self, asset, candles):
+        """Indicar si las velas enlazan con la última vela aplicada al estado de Wilder"""
+        state = self.rsi_state.get(asset)
+        if not state or not candles or len(candles) < 2 or state[3] is None:
+            return False
+        first_time = candles[0].get('from')
+        return first_time is not None and first_time <= state[3]
+    
+    def _seed_rsi(self, asset, closed_candles):
+        """Inicializar el estado de Wilder de un activo con sus velas cerradas"""
+        closes = np.fromiter(
+            (candle['close'] for candle in closed_candles), dtype=np.float64, count=len(closed_candles)
+        )
+        avg_gain, avg_loss = wilder_averages(closes, self.rsi_period)
+        self.rsi_state[asset] = (avg_gain, avg_loss, float(closes[-1]), closed_candles[-1].get('from'))
+    
+    def _drop_stale_rsi_state(self, window=100 * 300):
+        """
+        Descartar estados de Wilder que ya no pueden continuarse
+        
+        Si la última vela aplicada es más antigua que la ventana que se
+        descarga (100 velas de 5 minutos), ninguna respuesta futura enlazará
+        con ella y el activo se volverá a sembrar de todos modos.
+        """
+        cutoff = time.time() - window
+        stale = [asset for asset, state in self.rsi_state.items() if state[3] is None or state[3] < cutoff]
+        for asset in stale:
+            del self.rsi_state[asset]
+        return len(stale)
+    
+    def update_rsi(self, asset, close, candle_time):
+        """Actualizar el estado de Wilder de un activo con una nueva vela cerrada (O(1))"""
+        avg_gain, avg_loss, last_close, _ = self.rsi_state[asset]
+        avg_gain, avg_loss = update_wilder_averages(avg_gain, avg_loss, close - last_close, self.rsi_period)
+        self.rsi_state[asset] = (avg_gain, avg_loss, close, candle_time)
+    
+    def _incremental_rsi(self, asset, candles):
+        """
+        RSI actual de un activo sin recorrer toda la ventana de velas
+        
+        La última vela es la que está en formación: las cerradas se aplican
+        al estado de Wilder y la actual solo se usa para el valor en vivo.
+        """
+        closed, live = candles[:-1], candles[-1]
+        
+        # Sembrar si no hay estado o si la ventana ya no contiene la última vela aplicada
+        if not self._continues_rsi_state(asset, candles):
+            if len(closed) < self.rsi_period + 1:
+                return calculate_rsi(candles, self.rsi_period)
+            self._seed_rsi(asset, closed)
+        else:
+            # Velas cerradas nuevas desde la última actualización (normalmente 0 o 1)
+            last_time = self.rsi_state[asset][3]
+            start = len(closed)
+            while start > 0 and closed[start - 1]['from'] > last_time:
+                start -= 1
+            for candle in closed[start:]:
+                self.update_rsi(asset, float(candle['close']), candle['from'])
+        
+        # Valor en vivo con la vela en formación, sin modificar el estado
+        avg_gain, avg_loss, last_close, _ = self.rsi_state[asset]
+        avg_gain, avg_loss = update_wilder_averages(
+            avg_gain, avg_loss, float(live['close']) - last_close, self.rsi_period
+        )
+        return rsi_from_averages(avg_gain, avg_loss)
+    
     def place_option(self, asset, direction, amount):
-        """Colocar una opción binaria con reintentos automáticos"""
-        max_retries = 2
+        """
+        Colocar una opción binaria con reintentos automáticos
+        
+        ORDER_RETRY_BACKOFF da, para cada motivo de reintento, la pausa
+        previa a cada uno; el número de reintentos es el de la tabla más
+        larga (si una se queda corta se repite su última pausa). Un buy que
+        agota su timeout nunca se reintenta: la orden pudo enviarse igual.
+        """
+        backoff = ORDER_RETRY_BACKOFF
+        max_retries = max(len(delays) for delays in backoff.values()) + 1
         retry_count = 0
         
         while retry_count < max_retries:
             try:
-                asset_name = self.iqoption_assets[asset]
-                option_type = self.asset_option_types[asset]
+                asset_name, option_type = self.asset_routes[asset]
                 
                 self.logger.info(f"📈 Colocando {direction} en {asset} ({asset_name}), cantidad: {format_currency(amount)}")
                 
-                status, order_id = self.api_call_with_timeout(
-                    self.iqoption.buy,
-                    int(amount),
-                    asset_name,
-                    direction.lower(),
-                    self.expiry_minutes
-                )
+                self.last_activity_time = time.time()
+                try:
+                    status, order_id = run_with_timeout(
+                        self._serialized(self.iqoption.buy, API_TIMEOUT, self._order_lock),
+                        (int(amount), asset_name, direction.lower(), self.expiry_minutes),
+                        None,
+                        API_TIMEOUT
+                    )
+                except TimeoutError:
+                    # El hilo abandonado aún puede enviar la orden: reintentar podría duplicarla
+                    self.logger.error(
+                        "⚠️ TIMEOUT colocando %s en %s: estado de la orden desconocido, no se reintenta",
+                        direction, asset
+                    )
+                    return None
                 
                 if status:
                     self.logger.info(f"✅ Orden colocada exitosamente. ID: {order_id}")
@@ -720,7 +1077,9 @@ class MultiAssetRSIBinaryOptionsStrategy:
                         if self.handle_trading_error(asset, error_msg):
                             retry_count += 1
                             self.logger.info(f"🔄 Reintentando con activo alternativo... (intento {retry_count + 1}/{max_retries})")
-                            time.sleep(1)  # Pequeña pausa antes de reintentar
+                            delays = backoff["unavailable"]
+                            if self._stopping.wait(delays[min(retry_count, len(delays)) - 1]):  # Pausa antes de reintentar
+                                return None
                             continue
                     
                     self.logger.error(f"❌ Error colocando orden: {error_msg}")
@@ -733,7 +1092,9 @@ class MultiAssetRSIBinaryOptionsStrategy:
                 if retry_count < max_retries - 1:
                     retry_count += 1
                     self.logger.info(f"🔄 Reintentando... (intento {retry_count + 1}/{max_retries})")
-                    time.sleep(2)
+                    delays = backoff["error"]
+                    if self._stopping.wait(delays[min(retry_count, len(delays)) - 1]):
+                        return None
                     continue
                 
                 return None
@@ -741,108 +1102,213 @@ class MultiAssetRSIBinaryOptionsStrategy:
         return None
     
     def process_asset(self, asset):
-        """Procesar señales para un activo"""
-        # Verificar si estamos en período de calentamiento
-        if time.time() < self.warmup_end_time:
-            remaining_minutes = (self.warmup_end_time - time.time()) / 60
+        """Procesar señales para un activo (los errores se registran, no se propagan)"""
+        try:
+            # Verificar si estamos en período de calentamiento
+            remaining_minutes = (self._warmup_end_monotonic - time.monotonic()) / 60
             if remaining_minutes > 0:
-                self.logger.debug(f"⏳ En calentamiento - faltan {remaining_minutes:.1f} minutos")
+                self.logger.debug("⏳ En calentamiento - faltan %.1f minutos", remaining_minutes)
                 return
-        
-        # Verificar si hay órdenes activas
-        if len(self.active_options.get(asset, [])) > 0:
-            return
-        
-        # Verificar tiempo desde última señal (ahora 1 hora)
-        time_since_last = (datetime.now() - self.last_signal_time.get(asset, datetime.min)).total_seconds() / 60
-        if time_since_last < self.min_time_between_signals:
-            return
-        
-        # Obtener RSI
-        current_rsi = self.get_rsi(asset)
-        if current_rsi is None:
-            return
-        
-        # Generar señal - LÓGICA INVERTIDA
-        signal = None
-        if current_rsi <= self.oversold_level:
-            signal = "PUT"  # INVERTIDO: Sobreventa genera PUT
-            self.logger.info(f"🔴 {asset} - Señal PUT (RSI: {current_rsi:.2f})")
-        elif current_rsi >= self.overbought_level:
-            signal = "CALL"  # INVERTIDO: Sobrecompra genera CALL
-            self.logger.info(f"🟢 {asset} - Señal CALL (RSI: {current_rsi:.2f})")
-        
-        if signal:
-            self.create_binary_option(asset, signal, current_rsi)
-            self.last_signal_time[asset] = datetime.now()
+            
+            # Verificar si hay órdenes activas
+            if len(self.active_options.get(asset, [])) > 0:
+                return
+            
+            # Verificar tiempo desde última señal (ahora 1 hora)
+            time_since_last = (time.monotonic() - self.last_signal_time.get(asset, float('-inf'))) / 60
+            if time_since_last < self.min_time_between_signals:
+                return
+            
+            # Obtener RSI
+            current_rsi = self.get_rsi(asset)
+            if current_rsi is None:
+                return
+            
+            # Generar señal - LÓGICA INVERTIDA
+            signal = None
+            if current_rsi <= self.oversold_level:
+                signal = "PUT"  # INVERTIDO: Sobreventa genera PUT
+                self.logger.info(f"🔴 {asset} - Señal PUT (RSI: {current_rsi:.2f})")
+            elif current_rsi >= self.overbought_level:
+                signal = "CALL"  # INVERTIDO: Sobrecompra genera CALL
+                self.logger.info(f"🟢 {asset} - Señal CALL (RSI: {current_rsi:.2f})")
+            
+            if signal:
+                self.create_binary_option(asset, signal, current_rsi)
+                with self._orders_lock:
+                    self.last_signal_time[asset] = time.monotonic()
+        except Exception as e:
+            self.logger.error(f"❌ Error procesando {asset}: {str(e)}")
     
     def create_binary_option(self, asset, direction, rsi_value):
         """Crear una opción binaria"""
-        # Calcular tamaño de posición
+        # Verificar capital disponible (lectura real antes de la orden)
+        current_balance = self._get_balance_cached(ttl=0)
+        
+        # Calcular tamaño de posición (reutiliza la lectura anterior)
         bet_size = self.calculate_position_size()
         
-        # Verificar capital disponible
-        current_balance = self.api_call_with_timeout(self.iqoption.get_balance)
         if current_balance is None or current_balance < bet_size:
             self.logger.warning(f"⚠️ Capital insuficiente para {asset}")
             return
         
+        # Con la estrategia deteniéndose la orden ya no se registraría
+        if self._stopping.is_set():
+            return
+        
         # Colocar orden
         order_id = self.place_option(asset, direction, bet_size)
         
         if order_id:
+            entry_time = datetime.now()
+            self._invalidate_balance()  # La orden cambia el balance
             # Registrar orden activa
             order_info = {
                 "id": order_id,
                 "type": direction,
                 "asset": asset,
                 "size": bet_size,
-                "entry_time": datetime.now(),
-                "expiry_time": datetime.now() + timedelta(minutes=self.expiry_minutes),
+                "entry_time": entry_time,
+                "expiry_time": entry_time + timedelta(minutes=self.expiry_minutes),
+                "expiry_epoch": entry_time.timestamp() + self.expiry_minutes * 60,  # Para comparar sin datetime
                 "rsi": rsi_value,
                 "balance_before": current_balance  # NUEVO: Guardar balance antes
             }
-            self.active_options[asset].append(order_info)
+            self._track_order(asset, order_info)
+            self._schedule_wake(order_info["expiry_epoch"] + 15.5 - time.time())  # Ver check_active_orders
             self.logger.info(f"📝 Orden registrada para {asset}")
+            self.mark_state_dirty()
+    
+    def _schedule_wake(self, delay):
+        """Despertar el bucle principal dentro de `delay` segundos"""
+        timer = threading.Timer(max(0.0, delay), self._wake.set)
+        timer.daemon = True
+        timer.start()
+    
+    def _wait_next_cycle(self, timeout):
+        """Esperar al siguiente ciclo; vuelve antes si alguien llama a _wake.set()"""
+        self._wake.wait(timeout)
+        self._wake.clear()
     
-    def check_active_orders(self):
-        """Verificar el estado de las órdenes activas"""
-        current_time = datetime.now()
+    def _track_order(self, asset, order):
+        """Registrar una orden activa y encolar su vencimiento"""
+        # Estados guardados antes de existir expiry_epoch
+        order.setdefault("expiry_epoch", order["expiry_time"].timestamp())
+        with self._orders_lock:
+            self.active_options[asset].append(order)
+            heapq.heappush(
+                self._expiry_heap,
+                (order["expiry_epoch"], next(self._expiry_seq), asset, order)
+            )
+    
+    def check_active_orders(self, now_ts=None):
+        """
+        Verificar el estado de las órdenes activas
         
-        for asset in list(self.active_options.keys()):
-            remaining_orders = []
+        Solo se extraen de la cola de vencimientos las órdenes que expiraron
+        hace más de 15 segundos; el resto no se recorre. Las que aún no tienen
+        resultado vuelven a la cola y se reintentan en el siguiente ciclo.
+        """
+        now_ts = now_ts or time.time()
+        deadline = now_ts - 15
+        
+        # Extraer todas las órdenes listas, agrupando sus ids por activo
+        ready = []
+        done = defaultdict(set)
+        with self._orders_lock:
+            while self._expiry_heap and self._expiry_heap[0][0] < deadline:
+                _, _, asset, order = heapq.heappop(self._expiry_heap)
+                ready.append((asset, order))
+                done[asset].add(id(order))
+        
+        # Verificar los resultados en paralelo si hay varias (cada una consulta la API)
+        if len(ready) > 1:
+            with ThreadPoolExecutor(max_workers=min(8, len(ready))) as pool:
+                resolved = list(pool.map(lambda pair: self.process_expired_order(*pair, now_ts), ready))
+        elif ready:
+            resolved = [self.process_expired_order(*ready[0], now_ts)]
+        else:
+            resolved = []
+        
+        with self._orders_lock:
+            # Las órdenes sin resultado siguen activas y vuelven a la cola
+            for (asset, order), is_resolved in zip(ready, resolved):
+                if not is_resolved:
+                    done[asset].discard(id(order))
+                    heapq.heappush(
+                        self._expiry_heap,
+                        (order["expiry_epoch"], next(self._expiry_seq), asset, order)
+                    )
             
-            for order in self.active_options[asset]:
-                # Calcular tiempo desde expiración
-                time_since_expiry = (current_time - order["expiry_time"]).total_seconds()
-                
-                # Si la orden expiró hace más de 15 segundos, procesarla
-                if time_since_expiry > 15:
-                    self.process_expired_order(asset, order)
-                # Si expiró pero es muy reciente, esperar un poco más
-                elif order["expiry_time"] <= current_time:
-                    self.logger.debug(f"⏳ Orden {order['id']} expiró hace {time_since_expiry:.0f}s, esperando...")
-                    remaining_orders.append(order)
+            # Reconstruir una sola vez la lista de cada activo afectado
+            for asset, done_ids in done.items():
+                remaining_orders = [o for o in self.active_options.get(asset, []) if id(o) not in done_ids]
+                if remaining_orders:
+                    self.active_options[asset] = remaining_orders
                 else:
-                    remaining_orders.append(order)
-            
-            if remaining_orders:
-                self.active_options[asset] = remaining_orders
-            else:
-                del self.active_options[asset]
+                    self.active_options.pop(asset, None)
+    
+    def _listinfodata_index(self, listinfodata):
+        """
+        Índice str(id) -> registro de api.listinfodata
+        
+        Se reconstruye solo cuando cambia el contenido (mismo objeto y
+        mismo número de registros = índice vigente). Al construirlo se
+        descartan las entradas que no tienen la forma esperada.
+        
+        El hilo del websocket modifica listinfodata mientras tanto: se
+        recorre una copia de sus valores, y el índice se lee y se
+        reemplaza bajo _listinfo_lock.
+        """
+        with self._listinfo_lock:
+            values = [list(value) for value in list(listinfodata.values()) if isinstance(value, list)]
+            signature = (id(listinfodata), len(values), sum(len(value) for value in values))
+            if signature != self._listinfo_signature:
+                index = {}
+                for value in values:
+                    for item in value:
+                        if isinstance(item, dict):
+                            index.setdefault(str(item.get('id')), item)
+                self._listinfo_index = index
+                self._listinfo_signature = signature
+            return self._listinfo_index
     
-    def process_expired_order(self, asset, order):
-        """Procesar una orden expirada - VERSIÓN FINAL CON TODOS LOS MÉTODOS"""
+    def process_expired_order(self, asset, order, now_ts=None):
+        """
+        Procesar una orden expirada - VERSIÓN FINAL CON TODOS LOS MÉTODOS
+        
+        Los métodos 1 y 2 solo leen datos que la librería ya recibió por el
+        websocket y se prueban en cada ciclo. Los que consultan la API se
+        activan por etapas (order['verify_state']): el balance a partir del
+        segundo intento y get_async_order a partir del tercero. Una orden que
+        se revisa por primera vez fuera de ese calendario (tras un reinicio,
+        el stop loss o un bloqueo diario) prueba todos los métodos a la vez;
+        solo se da por perdida después de haberlos probado todos, o tras
+        _MAX_VERIFY_ERRORS verificaciones fallidas por una excepción. Una orden
+        ya contabilizada (order['counted']) no se vuelve a procesar.
+        
+        Returns:
+            bool: True si la orden quedó resuelta (o se dio por perdida);
+                False si sigue pendiente o falló la verificación
+        """
+        if order.get("counted"):
+            return True
+        
+        stage = order.get("verify_state", 0)
         try:
             self.logger.info(f"🔄 Verificando orden {order['id']}...")
             
             # Verificar tiempo desde expiración
-            time_since_expiry = (datetime.now() - order["expiry_time"]).total_seconds()
+            time_since_expiry = (now_ts or time.time()) - order["expiry_epoch"]
             
             # Si es muy reciente, esperar
             if time_since_expiry < 10:
                 self.logger.info(f"⏳ Orden muy reciente ({time_since_expiry:.0f}s), esperando...")
-                return
+                return False
+            
+            # Fuera del calendario de etapas: probar ya todos los métodos
+            if time_since_expiry > 120:
+                stage = 3
             
             # Variables para resultado
             result_found = False
@@ -878,31 +1344,26 @@ class MultiAssetRSIBinaryOptionsStrategy:
             # MÉTODO 2: Verificar en api.listinfodata
             if not result_found and hasattr(self.iqoption.api, 'listinfodata') and isinstance(self.iqoption.api.listinfodata, dict):
                 self.logger.debug("📋 Buscando en listinfodata...")
-                for key, value in self.iqoption.api.listinfodata.items():
-                    if isinstance(value, list):
-                        for item in value:
-                            if isinstance(item, dict) and str(item.get('id')) == str(order['id']):
-                                result_found = True
-                                win_status = str(item.get('win', '')).lower()
-                                win_amount = float(item.get('win_amount', 0))
-                                
-                                self.logger.info(f"📋 Orden encontrada en listinfodata:")
-                                self.logger.info(f"   Win: {win_status}")
-                                self.logger.info(f"   Win Amount: {win_amount}")
-                                break
-                    if result_found:
-                        break
+                item = self._listinfodata_index(self.iqoption.api.listinfodata).get(str(order['id']))
+                if item is not None:
+                    result_found = True
+                    win_status = str(item.get('win', '')).lower()
+                    win_amount = float(item.get('win_amount', 0))
+                    
+                    self.logger.info(f"📋 Orden encontrada en listinfodata:")
+                    self.logger.info(f"   Win: {win_status}")
+                    self.logger.info(f"   Win Amount: {win_amount}")
             
             # MÉTODO 3: Verificar por balance (para cuentas REAL)
-            if not result_found and 'balance_before' in order:
-                current_balance = self.api_call_with_timeout(self.iqoption.get_balance)
+            if not result_found and stage >= 1 and 'balance_before' in order:
+                current_balance = self._get_balance_cached(ttl=0)
                 if current_balance is not None:
                     balance_diff = current_balance - order['balance_before']
                     
-                    self.logger.info(f"📊 Verificación por balance:")
-                    self.logger.info(f"   Balance antes: ${order['balance_before']:,.2f}")
-                    self.logger.info(f"   Balance ahora: ${current_balance:,.2f}")
-                    self.logger.info(f"   Diferencia: ${balance_diff:+,.2f}")
+                    self.logger.info("📊 Verificación por balance:")
+                    self.logger.info("   Balance antes: %s", format_currency(order['balance_before']))
+                    self.logger.info("   Balance ahora: %s", format_currency(current_balance))
+                    self.logger.info("   Diferencia: %s", format_currency(balance_diff, signed=True))
                     
                     # Solo usar balance si hay cambio significativo
                     if abs(balance_diff) > 0.1:
@@ -916,7 +1377,7 @@ class MultiAssetRSIBinaryOptionsStrategy:
                             result_found = True
             
             # MÉTODO 4: Intentar get_async_order como último recurso
-            if not result_found and time_since_expiry > 20:
+            if not result_found and stage >= 2 and time_since_expiry > 20:
                 self.logger.info("📋 Intentando get_async_order...")
                 order_result = self.api_call_with_timeout(
                     self.iqoption.get_async_order,
@@ -927,7 +1388,7 @@ class MultiAssetRSIBinaryOptionsStrategy:
                 if order_result and isinstance(order_result, dict):
                     # Procesar con la lógica original
                     self._process_order_result(asset, order, order_result)
-                    return
+                    return True
             
             # Procesar resultado si se encontró
             if result_found and win_status:
@@ -950,19 +1411,38 @@ class MultiAssetRSIBinaryOptionsStrategy:
                         self.process_tie(asset, order)
                     else:
                         self.process_loss(asset, order)
-                return
+                return True
             
-            # Si han pasado más de 2 minutos y no hay resultado, asumir pérdida
-            if time_since_expiry > 120:
+            # Si han pasado más de 2 minutos y ya se probaron todos los métodos, asumir pérdida
+            if stage >= 3 and time_since_expiry > 120:
                 self.logger.error(f"❌ No se pudo verificar orden después de {time_since_expiry:.0f}s")
                 self.logger.error(f"❌ Asumiendo pérdida por timeout")
                 self.process_loss(asset, order)
+                return True
+            
+            # Sin resultado todavía: pasar al siguiente método en el próximo ciclo
+            with self._orders_lock:
+                order["verify_state"] = min(stage + 1, 3)
+            return False
                 
         except Exception as e:
-            self.logger.error(f"❌ Error procesando orden expirada: {str(e)}")
-            self.logger.error(f"Detalles: {traceback.format_exc()}")
-            # En caso de error, registrar como pérdida para ser conservadores
-            self.process_loss(asset, order)
+            self.logger.exception("❌ Error procesando orden expirada: %s", e)
+            if order.get("counted"):
+                return True  # El resultado ya se contabilizó; falló lo posterior
+            
+            # Reintentar en el siguiente ciclo, avanzando de etapa como sin resultado
+            with self._orders_lock:
+                order["verify_state"] = min(stage + 1, 3)
+                errors = order["verify_errors"] = order.get("verify_errors", 0) + 1
+            if errors < _MAX_VERIFY_ERRORS:
+                return False
+            
+            self.logger.error("❌ Asumiendo pérdida tras %d errores verificando la orden %s", errors, order.get("id"))
+            try:
+                self.process_loss(asset, order)
+            except Exception:
+                self.logger.exception("❌ No se pudo registrar la pérdida; se descarta la orden")
+            return True
     
     def _process_order_result(self, asset, order, order_result):
         """Procesar resultado de orden desde get_async_order"""
@@ -1020,50 +1500,122 @@ class MultiAssetRSIBinaryOptionsStrategy:
     def process_win(self, asset, order, win_amount):
         """Procesar una operación ganadora"""
         profit = win_amount - order["size"]
-        self.logger.info(f"✅ {asset} - {order['type']} GANADA! Beneficio: {format_currency(profit)}")
-        
-        self.wins[asset] += 1
-        self.total_profit += profit
-        self.daily_profit += profit
-        self.consecutive_losses[asset] = 0
-        
-        # Resetear pérdidas consecutivas diarias
-        if self.daily_consecutive_losses > 0:
-            self.logger.info(f"✅ Pérdidas consecutivas diarias reseteadas: {self.daily_consecutive_losses} → 0")
-            self.daily_consecutive_losses = 0
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("✅ %s - %s GANADA! Beneficio: %s", asset, order['type'], format_currency(profit))
+        
+        with self._stats_lock:
+            # Resetear pérdidas consecutivas diarias
+            previous_daily_losses = self.daily_consecutive_losses
+            self._apply_result("win", asset, profit)
+            order["counted"] = True  # Antes de lo que pueda fallar después (ver process_expired_order)
+            self._append_event("win", asset, profit)
+        self._invalidate_balance()  # El resultado se acredita en el balance
+        
+        if previous_daily_losses > 0:
+            self.logger.info("✅ Pérdidas consecutivas diarias reseteadas: %s → 0", previous_daily_losses)
     
     def process_tie(self, asset, order):
         """Procesar una operación empatada (On The Money)"""
-        self.logger.info(f"🟡 {asset} - {order['type']} EMPATE (On The Money). Sin ganancia ni pérdida")
+        self.logger.info("🟡 %s - %s EMPATE (On The Money). Sin ganancia ni pérdida", asset, order['type'])
         
         # En un empate no se cuentan pérdidas consecutivas
         # pero tampoco se resetean
-        self.ties[asset] += 1
+        with self._stats_lock:
+            self._apply_result("tie", asset, 0.0)
+            order["counted"] = True
+            self._append_event("tie", asset, 0.0)
+        self._invalidate_balance()  # El resultado se acredita en el balance
         # No afecta el profit total ni las pérdidas consecutivas
         # Los empates NO resetean ni incrementan las pérdidas consecutivas diarias
     
     def process_loss(self, asset, order):
         """Procesar una operación perdedora"""
         loss = order["size"]
-        self.logger.info(f"❌ {asset} - {order['type']} PERDIDA. Pérdida: {format_currency(loss)}")
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("❌ %s - %s PERDIDA. Pérdida: %s", asset, order['type'], format_currency(loss))
+        
+        with self._stats_lock:
+            self._apply_result("loss", asset, loss)
+            order["counted"] = True
+            self._append_event("loss", asset, loss)
+            streak = self.stats[self.asset_idx[asset], STAT_STREAK]
+            daily_losses = self.daily_consecutive_losses
+            
+            # Verificar si alcanzamos el límite diario (solo un hilo lo activa)
+            reached_limit = daily_losses >= self.max_daily_consecutive_losses and not self.daily_loss_lock
+            if reached_limit:
+                self.daily_loss_lock = True
         
-        self.losses[asset] += 1
-        self.total_profit -= loss
-        self.daily_profit -= loss
-        self.consecutive_losses[asset] += 1
+        self.logger.info("📊 %s - Pérdidas consecutivas: %s", asset, streak)
+        self.logger.info("📊 Pérdidas consecutivas del día: %s/%s", daily_losses, self.max_daily_consecutive_losses)
         
-        # Incrementar pérdidas consecutivas diarias
-        self.daily_consecutive_losses += 1
+        if reached_limit:
+            self.activate_daily_loss_lock()
+    
+    def _apply_result(self, result, asset, amount):
+        """
+        Aplicar un resultado a estadísticas y profits (llamar con _stats_lock)
         
-        self.logger.info(f"📊 {asset} - Pérdidas consecutivas: {self.consecutive_losses[asset]}")
-        self.logger.info(f"📊 Pérdidas consecutivas del día: {self.daily_consecutive_losses}/{self.max_daily_consecutive_losses}")
+        Args:
+            result: "win", "loss" o "tie"
+            asset: Activo de la operación
+            amount: Beneficio (win) o tamaño perdido (loss)
+        """
+        row = self._stat_row(asset)
+        if result == "win":
+            self.stats[row, STAT_WINS] += 1
+            self.stats[row, STAT_STREAK] = 0
+            self.total_profit += amount
+            self.daily_profit += amount
+            self.daily_consecutive_losses = 0
+        elif result == "loss":
+            self.stats[row, STAT_LOSSES] += 1
+            self.stats[row, STAT_STREAK] += 1
+            self.total_profit -= amount
+            self.daily_profit -= amount
+            self.daily_consecutive_losses += 1
+        else:
+            self.stats[row, STAT_TIES] += 1
+    
+    def _append_event(self, result, asset, amount):
+        """
+        Añadir un resultado al registro de eventos (llamar con _stats_lock)
         
-        # Verificar si alcanzamos el límite diario
-        if self.daily_consecutive_losses >= self.max_daily_consecutive_losses and not self.daily_loss_lock:
-            self.activate_daily_loss_lock()
+        Es una sola línea al final del archivo en lugar de reescribir todo el
+        estado; el escritor en segundo plano hace el guardado completo y
+        load_state vuelve a aplicar los eventos posteriores a ese guardado.
+        """
+        self._event_seq += 1
+        event = {"seq": self._event_seq, "t": time.time(), "ev": result, "asset": asset, "amount": amount}
+        try:
+            with open(EVENT_LOG_FILE, "ab") as f:
+                f.write(json_dumps(event) + b"\n")
+        except Exception as e:
+            self.logger.error(f"❌ Error registrando evento: {str(e)}")
+        self.mark_state_dirty()
+    
+    def _replay_events(self):
+        """Aplicar los eventos del registro posteriores al último guardado completo"""
+        if not os.path.exists(EVENT_LOG_FILE):
+            return 0
+        
+        replayed = 0
+        with open(EVENT_LOG_FILE, "rb") as f:
+            for line in f:
+                try:
+                    event = json_loads(line)
+                except ValueError:
+                    continue  # Línea incompleta (cierre inesperado a mitad de escritura)
+                if event["seq"] <= self._event_seq:
+                    continue
+                self._apply_result(event["ev"], event["asset"], event["amount"])
+                self._event_seq = event["seq"]
+                replayed += 1
         
-        # Guardar estado después de cada pérdida
-        self.save_state()
+        if self.daily_consecutive_losses >= self.max_daily_consecutive_losses and not self.daily_loss_lock:
+            self.daily_loss_lock = True
+            self.daily_loss_lock_time = datetime.now()
+        return replayed
     
     def activate_daily_loss_lock(self):
         """Activar el bloqueo diario por pérdidas consecutivas"""
@@ -1071,22 +1623,31 @@ class MultiAssetRSIBinaryOptionsStrategy:
         self.daily_loss_lock_time = datetime.now()
         
         # Obtener balance actual para mostrar
-        current_balance = self.api_call_with_timeout(self.iqoption.get_balance)
+        current_balance = self._get_balance_cached()
         
         self.logger.info("=" * 60)
         self.logger.info("❌ LÍMITE DE PÉRDIDAS CONSECUTIVAS ALCANZADO")
         self.logger.info("=" * 60)
         self.logger.info(f"📊 Pérdidas consecutivas: {self.daily_consecutive_losses}")
         self.logger.info(f"💰 Profit del día: {format_currency(self.daily_profit)}")
-        self.logger.info(f"📊 Balance actual: {format_currency(current_balance)}")
-        self.logger.info(f"🕐 Hora: {self.daily_loss_lock_time.strftime('%H:%M:%S')}")
+        self.logger.info(f"📊 Balance actual: {format_currency(current_balance) if current_balance is not None else 'N/A'}")
+        self.logger.info(f"🕐 Hora: {_clock_time(self.daily_loss_lock_time)}")
         self.logger.info("🛑 Trading pausado por el resto del día")
         self.logger.info("🔄 El trading se reanudará mañana")
         self.logger.info("=" * 60)
     
-    def check_stop_loss(self):
+    def _current_month_key(self, now=None):
+        """Clave 'AAAA-MM' del mes actual, recalculada como máximo una vez por minuto"""
+        ts = time.time()
+        if ts - self._cached_month_epoch > 60:
+            now = now or datetime.now()
+            self._cached_month_key = f"{now.year}-{now.month:02d}"
+            self._cached_month_epoch = ts
+        return self._cached_month_key
+    
+    def check_stop_loss(self, now=None):
         """Verificar condiciones de stop loss"""
-        current_capital = self.api_call_with_timeout(self.iqoption.get_balance)
+        current_capital = self._get_balance_cached()
         if current_capital is None:
             return True
         
@@ -1107,7 +1668,7 @@ class MultiAssetRSIBinaryOptionsStrategy:
             return False
         
         # Stop loss mensual
-        current_month = f"{datetime.now().year}-{datetime.now().month:02d}"
+        current_month = self._current_month_key(now)
         
         if self.current_month != current_month:
             self.on_new_month(current_month, current_capital)
@@ -1131,10 +1692,8 @@ class MultiAssetRSIBinaryOptionsStrategy:
         """Verificar si debemos parar de operar por profit diario"""
         # Si ya está activado el lock, solo mostrar mensaje periódicamente
         if self.daily_profit_lock:
-            if time.time() % 600 < 15:  # Cada 10 minutos aproximadamente
-                self.logger.info(f"🔒 Trading pausado - Profit diario alcanzado: {format_currency(self.daily_profit_lock_amount)}")
-            time.sleep(15)  # Dormir un poco más cuando está en lock
-            return True
+            self._wait_for_unlock()
+            return self.daily_profit_lock
         
         # Solo verificar si no hay posiciones abiertas
         if len(self.active_options) > 0:
@@ -1147,14 +1706,14 @@ class MultiAssetRSIBinaryOptionsStrategy:
             self.daily_profit_lock_time = datetime.now()
             
             # Obtener balance actual para mostrar
-            current_balance = self.api_call_with_timeout(self.iqoption.get_balance)
+            current_balance = self._get_balance_cached()
             
             self.logger.info("=" * 60)
             self.logger.info("🎯 OBJETIVO DIARIO ALCANZADO - TRADING PAUSADO")
             self.logger.info("=" * 60)
             self.logger.info(f"💰 Profit del día: {format_currency(self.daily_profit)}")
-            self.logger.info(f"📊 Balance actual: {format_currency(current_balance)}")
-            self.logger.info(f"🕐 Hora: {self.daily_profit_lock_time.strftime('%H:%M:%S')}")
+            self.logger.info(f"📊 Balance actual: {format_currency(current_balance) if current_balance is not None else 'N/A'}")
+            self.logger.info(f"🕐 Hora: {_clock_time(self.daily_profit_lock_time)}")
             self.logger.info("✅ No se realizarán más operaciones hoy")
             self.logger.info("🔄 El trading se reanudará mañana")
             self.logger.info("=" * 60)
@@ -1166,47 +1725,94 @@ class MultiAssetRSIBinaryOptionsStrategy:
     def check_daily_loss_lock(self):
         """Verificar si el trading está bloqueado por pérdidas consecutivas"""
         if self.daily_loss_lock:
-            if time.time() % 600 < 15:  # Cada 10 minutos aproximadamente
-                self.logger.info(f"🔒 Trading pausado - {self.daily_consecutive_losses} pérdidas consecutivas alcanzadas")
-            time.sleep(15)
-            return True
+            self._wait_for_unlock()
+            return self.daily_loss_lock
         return False
     
+    def _wait_for_unlock(self, max_wait=15.0):
+        """
+        Esperar un ciclo mientras dura un bloqueo diario
+        
+        Duerme como máximo `max_wait` segundos (o hasta la medianoche, o hasta
+        que on_new_day o _finalize_run lo despierten), así el bucle sigue
+        verificando la conexión mientras tanto. Las órdenes abiertas al
+        activarse el bloqueo se verifican en cada espera y otra vez justo
+        antes del reseteo de medianoche, para que sus resultados cuenten en
+        el día en que se abrieron.
+        """
+        self._start_lock_log()
+        self.check_active_orders()
+        self._unlock_event.wait(timeout=min(max_wait, max(0.0, self._next_day_ts - time.time())))
+        if time.time() >= self._next_day_ts:
+            self.check_active_orders()
+            self.on_new_day()
+        self._unlock_event.clear()
+    
+    def _start_lock_log(self):
+        """Programar el log del bloqueo cada 10 minutos (si no está ya programado)"""
+        if self._lock_log_timer is None or not self._lock_log_timer.is_alive():
+            self._lock_log_timer = threading.Timer(600, self._emit_lock_log)
+            self._lock_log_timer.daemon = True
+            self._lock_log_timer.start()
+    
+    def _emit_lock_log(self):
+        """Mostrar el motivo del bloqueo y volver a programarse mientras dure"""
+        if self.daily_profit_lock:
+            self.logger.info(f"🔒 Trading pausado - Profit diario alcanzado: {format_currency(self.daily_profit_lock_amount)}")
+        elif self.daily_loss_lock:
+            self.logger.info(f"🔒 Trading pausado - {self.daily_consecutive_losses} pérdidas consecutivas alcanzadas")
+        else:
+            return  # Sin bloqueo: no se vuelve a programar
+        
+        self._lock_log_timer = threading.Timer(600, self._emit_lock_log)
+        self._lock_log_timer.daemon = True
+        self._lock_log_timer.start()
+    
     def on_new_day(self):
         """Resetear variables diarias"""
         self.logger.info("🌅 Reseteando variables para nuevo día de trading")
+        self._invalidate_balance()
+        
+        # Todo el reseteo bajo _stats_lock: el escritor de estado no debe ver el
+        # profit del día a la vez en monthly_profits y en daily_profit
+        with self._stats_lock:
+            # Resetear daily profit lock
+            if self.daily_profit_lock:
+                self.logger.info(f"🔓 Desbloqueando trading - Profit del día anterior: {format_currency(self.daily_profit_lock_amount)}")
+                self.daily_profit_lock = False
+                self.daily_profit_lock_amount = 0.0
+                self.daily_profit_lock_time = None
+            
+            # Resetear daily loss lock
+            if self.daily_loss_lock:
+                self.logger.info(f"🔓 Desbloqueando trading - {self.daily_consecutive_losses} pérdidas consecutivas del día anterior")
+                self.daily_loss_lock = False
+                self.daily_loss_lock_time = None
+            
+            # Resetear contador de pérdidas consecutivas diarias
+            if self.daily_consecutive_losses > 0:
+                self.logger.info(f"✅ Reseteando pérdidas consecutivas diarias: {self.daily_consecutive_losses} → 0")
+                self.daily_consecutive_losses = 0
+            
+            # Resetear pérdidas consecutivas por activo (esto sí lo mantenemos para estadísticas)
+            for asset, row in self.asset_idx.items():
+                if self.stats[row, STAT_STREAK] > 0:
+                    self.logger.info(f"✅ Reseteando pérdidas consecutivas de {asset}: {self.stats[row, STAT_STREAK]} → 0")
+            self.stats[:, STAT_STREAK] = 0
+            
+            # Actualizar beneficios mensuales
+            if self.last_date:
+                month_key = f"{self.last_date.year}-{self.last_date.month:02d}"
+                self.monthly_profits[month_key] = self.monthly_profits.get(month_key, 0.0) + self.daily_profit
+            
+            self.daily_profit = 0
+            self.last_date = date.today()
         
-        # Resetear daily profit lock
-        if self.daily_profit_lock:
-            self.logger.info(f"🔓 Desbloqueando trading - Profit del día anterior: {format_currency(self.daily_profit_lock_amount)}")
-            self.daily_profit_lock = False
-            self.daily_profit_lock_amount = 0.0
-            self.daily_profit_lock_time = None
-        
-        # Resetear daily loss lock
-        if self.daily_loss_lock:
-            self.logger.info(f"🔓 Desbloqueando trading - {self.daily_consecutive_losses} pérdidas consecutivas del día anterior")
-            self.daily_loss_lock = False
-            self.daily_loss_lock_time = None
-        
-        # Resetear contador de pérdidas consecutivas diarias
-        if self.daily_consecutive_losses > 0:
-            self.logger.info(f"✅ Reseteando pérdidas consecutivas diarias: {self.daily_consecutive_losses} → 0")
-            self.daily_consecutive_losses = 0
-        
-        # Resetear pérdidas consecutivas por activo (esto sí lo mantenemos para estadísticas)
-        for asset in list(self.consecutive_losses.keys()):
-            if self.consecutive_losses[asset] > 0:
-                self.logger.info(f"✅ Reseteando pérdidas consecutivas de {asset}: {self.consecutive_losses[asset]} → 0")
-            self.consecutive_losses[asset] = 0
-        
-        # Actualizar beneficios mensuales
-        if self.last_date:
-            month_key = f"{self.last_date.year}-{self.last_date.month:02d}"
-            self.monthly_profits[month_key] += self.daily_profit
+        # Estados de RSI de activos sin velas recientes (p. ej. mercado cerrado)
+        self._drop_stale_rsi_state()
         
-        self.daily_profit = 0
-        self.last_date = datetime.now().date()
+        self._next_day_ts = _next_midnight_ts()
+        self._unlock_event.set()  # Despertar a quien espere en un bloqueo diario
         self.logger.info("✅ Variables diarias reseteadas")
     
     def on_new_month(self, new_month, current_capital):
@@ -1221,74 +1827,165 @@ class MultiAssetRSIBinaryOptionsStrategy:
             self.stop_loss_triggered_month = None
             self.logger.info("✅ Stop loss mensual reseteado")
     
+    def mark_state_dirty(self):
+        """Marcar el estado como modificado; el escritor en segundo plano lo guardará"""
+        self._state_dirty.set()
+    
+    def _state_writer_loop(self, interval=5):
+        """Guardar el estado fuera del bucle de trading cuando haya cambios"""
+        while True:
+            if self._state_dirty.wait(interval):
+                self._state_dirty.clear()
+                if not self.save_state():
+                    self._state_dirty.set()  # Reintentar en la siguiente vuelta
+                time.sleep(interval)  # Agrupar cambios seguidos en una sola escritura
+    
+    def _stat_row(self, asset):
+        """
+        Fila de self.stats de un activo (se añade si no estaba en la tabla)
+        
+        La tabla crece al doble cuando se llena, así que cargar un estado con
+        muchos activos desconocidos no copia la tabla en cada alta. Las filas
+        aún sin activo quedan a cero y no afectan a sumas ni al guardado.
+        """
+        row = self.asset_idx.get(asset)
+        if row is None:
+            row = self.asset_idx[asset] = len(self.asset_idx)
+            if row >= len(self.stats):
+                self.stats = np.vstack([self.stats, np.zeros((max(1, len(self.stats)), self.stats.shape[1]), dtype=np.int64)])
+        return row
+    
+    def _stats_to_dicts(self):
+        """Convertir self.stats al formato {clave: {activo: valor}} del archivo de estado"""
+        # Una sola conversión de la tabla a enteros de Python
+        rows = self.stats.tolist()
+        used = self.stats.any(axis=1).tolist()
+        active = [(asset, rows[row]) for asset, row in self.asset_idx.items() if used[row]]
+        return {
+            key: {asset: values[col] for asset, values in active}
+            for col, key in enumerate(_STAT_KEYS)
+        }
+    
+    def _traded_assets(self):
+        """
+        Activos con alguna operación y su fila [wins, losses, ties, racha]
+        
+        La selección se hace de una vez sobre la tabla, sin recorrer los
+        activos que nunca operaron; se mantiene el orden de asset_idx.
+        """
+        rows = self.stats.tolist()
+        traded = self.stats[:, :STAT_STREAK].any(axis=1).tolist()
+        return [(asset, rows[row]) for asset, row in self.asset_idx.items() if traded[row]]
+    
+    def _stats_from_dicts(self, state):
+        """Cargar self.stats desde los diccionarios por activo del archivo de estado"""
+        self.stats[:] = 0
+        for col, key in enumerate(_STAT_KEYS):
+            for asset, value in state.get(key, {}).items():
+                row = self._stat_row(asset)
+                self.stats[row, col] = value
+    
+    def _build_state(self):
+        """
+        Construir el diccionario serializable con el estado actual
+        
+        Las fechas (datetime/date) se dejan como objetos: json_dumps las
+        escribe en formato ISO, igual que isoformat(); las órdenes se copian
+        superficialmente bajo _orders_lock.
+        """
+        # Los instantes monotónicos se guardan como hora de reloj
+        wall_offset = time.time() - time.monotonic()
+        
+        # Copiar bajo _orders_lock lo que modifican los hilos del pool
+        with self._orders_lock:
+            active_options = {asset: [dict(order) for order in orders] for asset, orders in self.active_options.items()}
+            last_signal_time = dict(self.last_signal_time)
+        
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "strategy_mode": STRATEGY_MODE,
+            "active_options": active_options,
+            "last_signal_time": {
+                asset: datetime.fromtimestamp(ts + wall_offset).isoformat() if ts != float('-inf') else "datetime.min"
+                for asset, ts in last_signal_time.items()
+            },
+            "daily_lockouts": dict(self.daily_lockouts),
+            **self._stats_to_dicts(),  # wins, losses, ties (empates), consecutive_losses
+            "total_profit": self.total_profit,
+            "daily_profit": self.daily_profit,
+            "monthly_profits": dict(self.monthly_profits),
+            "monthly_starting_capital": self.monthly_starting_capital,
+            "monthly_stop_loss": self.monthly_stop_loss,
+            "stop_loss_triggered_month": self.stop_loss_triggered_month,
+            "absolute_stop_loss_activated": self.absolute_stop_loss_activated,
+            "min_capital": self.min_capital,
+            "last_date": self.last_date,
+            "current_month": self.current_month,
+            "daily_profit_lock": self.daily_profit_lock,
+            "daily_profit_lock_amount": self.daily_profit_lock_amount,
+            "daily_profit_lock_time": self.daily_profit_lock_time,
+            "daily_consecutive_losses": self.daily_consecutive_losses,
+            "daily_loss_lock": self.daily_loss_lock,
+            "daily_loss_lock_time": self.daily_loss_lock_time,
+            "max_daily_consecutive_losses": self.max_daily_consecutive_losses,
+            "event_seq": self._event_seq
+        }
+    
+    @staticmethod
+    def _state_fingerprint(state):
+        """Huella (blake2b de 16 bytes) del estado serializado, sin la marca de tiempo"""
+        payload = json_dumps({key: value for key, value in state.items() if key != "timestamp"})
+        return hashlib.blake2b(payload, digest_size=16).digest()
+    
     def save_state(self):
-        """Guardar estado actual de la estrategia"""
+        """
+        Guardar estado actual de la estrategia
+        
+        Returns:
+            bool: True si se guardó correctamente
+        """
         try:
-            state = {
-                "timestamp": datetime.now().isoformat(),
-                "strategy_mode": STRATEGY_MODE,
-                "active_options": {
-                    asset: [
-                        {
-                            **order,
-                            "entry_time": order["entry_time"].isoformat(),
-                            "expiry_time": order["expiry_time"].isoformat()
-                        }
-                        for order in orders
-                    ]
-                    for asset, orders in self.active_options.items()
-                },
-                "last_signal_time": {
-                    asset: time.isoformat() if time != datetime.min else "datetime.min"
-                    for asset, time in self.last_signal_time.items()
-                },
-                "consecutive_losses": dict(self.consecutive_losses),
-                "daily_lockouts": dict(self.daily_lockouts),
-                "wins": dict(self.wins),
-                "losses": dict(self.losses),
-                "ties": dict(self.ties),  # Guardar empates
-                "total_profit": self.total_profit,
-                "daily_profit": self.daily_profit,
-                "monthly_profits": dict(self.monthly_profits),
-                "monthly_starting_capital": self.monthly_starting_capital,
-                "monthly_stop_loss": self.monthly_stop_loss,
-                "stop_loss_triggered_month": self.stop_loss_triggered_month,
-                "absolute_stop_loss_activated": self.absolute_stop_loss_activated,
-                "min_capital": self.min_capital,
-                "last_date": self.last_date.isoformat() if self.last_date else None,
-                "current_month": self.current_month,
-                "daily_profit_lock": self.daily_profit_lock,
-                "daily_profit_lock_amount": self.daily_profit_lock_amount,
-                "daily_profit_lock_time": self.daily_profit_lock_time.isoformat() if self.daily_profit_lock_time else None,
-                "daily_consecutive_losses": self.daily_consecutive_losses,
-                "daily_loss_lock": self.daily_loss_lock,
-                "daily_loss_lock_time": self.daily_loss_lock_time.isoformat() if self.daily_loss_lock_time else None,
-                "max_daily_consecutive_losses": self.max_daily_consecutive_losses
-            }
-            
-            with open(STATE_FILE, "w") as f:
-                json.dump(state, f, indent=4)
+            with self._state_write_lock:
+                with self._stats_lock:
+                    state = self._build_state()
+                
+                # No reescribir si nada cambió (la marca de tiempo no cuenta)
+                state_hash = self._state_fingerprint(state)
+                if state_hash == self._state_hash:
+                    return True
+                
+                write_json_atomic(STATE_FILE, state)
+                self._state_hash = state_hash
+                
+                # Los eventos ya están en el archivo de estado: vaciar el registro
+                # (salvo que haya llegado alguno nuevo mientras se escribía)
+                with self._stats_lock:
+                    if self._event_seq == state["event_seq"]:
+                        open(EVENT_LOG_FILE, "wb").close()
             
             self.logger.debug("💾 Estado guardado correctamente")
+            return True
             
         except Exception as e:
             self.logger.error(f"❌ Error guardando estado: {str(e)}")
+            return False
     
     def load_state(self):
         """Cargar estado previo si existe"""
         try:
             if not os.path.exists(STATE_FILE):
                 self.logger.info("📂 No hay archivo de estado previo")
-                self.last_date = datetime.now().date()
-                self.current_month = f"{datetime.now().year}-{datetime.now().month:02d}"
+                self.last_date = date.today()
+                self.current_month = f"{self.last_date.year}-{self.last_date.month:02d}"
                 self.monthly_starting_capital[self.current_month] = self.initial_capital
+                self._replay_events()
                 return
             
-            with open(STATE_FILE, "r") as f:
-                state = json.load(f)
+            state = read_json_file(STATE_FILE)
             
             # Cargar órdenes activas
             self.active_options = defaultdict(list)
+            self._expiry_heap = []
             for asset, orders in state.get("active_options", {}).items():
                 for order in orders:
                     order["entry_time"] = datetime.fromisoformat(order["entry_time"])
@@ -1296,25 +1993,21 @@ class MultiAssetRSIBinaryOptionsStrategy:
                     # Compatibilidad: cambiar 'pair' a 'asset' si existe
                     if 'pair' in order and 'asset' not in order:
                         order['asset'] = order.pop('pair')
-                    self.active_options[asset].append(order)
+                    self._track_order(asset, order)
             
             # Cargar tiempos de última señal
-            self.last_signal_time = defaultdict(lambda: datetime.min)
+            self.last_signal_time = {}
+            wall_offset = time.time() - time.monotonic()
             for asset, time_str in state.get("last_signal_time", {}).items():
-                if time_str == "datetime.min":
-                    self.last_signal_time[asset] = datetime.min
-                else:
-                    self.last_signal_time[asset] = datetime.fromisoformat(time_str)
+                if time_str != "datetime.min":
+                    self.last_signal_time[asset] = datetime.fromisoformat(time_str).timestamp() - wall_offset
             
             # Cargar estadísticas
-            self.consecutive_losses = defaultdict(int, state.get("consecutive_losses", {}))
-            self.daily_lockouts = defaultdict(bool, state.get("daily_lockouts", {}))
-            self.wins = defaultdict(int, state.get("wins", {}))
-            self.losses = defaultdict(int, state.get("losses", {}))
-            self.ties = defaultdict(int, state.get("ties", {}))  # Cargar empates
+            self.daily_lockouts = dict(state.get("daily_lockouts", {}))
+            self._stats_from_dicts(state)  # Incluye empates
             self.total_profit = state.get("total_profit", 0)
             self.daily_profit = state.get("daily_profit", 0)
-            self.monthly_profits = defaultdict(float, state.get("monthly_profits", {}))
+            self.monthly_profits = dict(state.get("monthly_profits", {}))
             self.monthly_starting_capital = state.get("monthly_starting_capital", {})
             self.monthly_stop_loss = state.get("monthly_stop_loss", False)
             self.stop_loss_triggered_month = state.get("stop_loss_triggered_month", None)
@@ -1340,26 +2033,37 @@ class MultiAssetRSIBinaryOptionsStrategy:
                 self.daily_loss_lock_time = None
             self.max_daily_consecutive_losses = state.get("max_daily_consecutive_losses", 3)
             
+            # Resultados registrados después del último guardado completo
+            self._event_seq = state.get("event_seq", 0)
+            replayed = self._replay_events()
+            if replayed:
+                self.logger.info(f"📂 {replayed} resultados recuperados del registro de eventos")
+            
             # Cargar fechas
             last_date_str = state.get("last_date")
             if last_date_str:
                 self.last_date = datetime.fromisoformat(last_date_str).date()
             else:
-                self.last_date = datetime.now().date()
+                self.last_date = date.today()
+            
+            today = date.today()
+            self.current_month = state.get("current_month", f"{today.year}-{today.month:02d}")
             
-            self.current_month = state.get("current_month", f"{datetime.now().year}-{datetime.now().month:02d}")
+            # Sin eventos que aplicar, lo cargado coincide con el disco: no reescribirlo
+            if not replayed:
+                self._state_hash = self._state_fingerprint(self._build_state())
             
             self.logger.info(f"✅ Estado cargado desde {state.get('timestamp', 'N/A')}")
             
         except Exception as e:
             self.logger.error(f"❌ Error cargando estado: {str(e)}")
-            self.last_date = datetime.now().date()
-            self.current_month = f"{datetime.now().year}-{datetime.now().month:02d}"
+            self.last_date = date.today()
+            self.current_month = f"{self.last_date.year}-{self.last_date.month:02d}"
             self.monthly_starting_capital[self.current_month] = self.initial_capital
     
     def print_summary(self):
         """Imprimir resumen de la estrategia"""
-        current_capital = self.api_call_with_timeout(self.iqoption.get_balance)
+        current_capital = self._get_balance_cached()
         if current_capital is None:
             current_capital = self.initial_capital
         
@@ -1374,9 +2078,7 @@ class MultiAssetRSIBinaryOptionsStrategy:
         self.logger.info(f"📈 Rendimiento Total: {total_return:.2f}%")
         
         # Estadísticas por operaciones
-        total_wins = sum(self.wins.values())
-        total_losses = sum(self.losses.values())
-        total_ties = sum(self.ties.values())
+        total_wins, total_losses, total_ties, _ = self.stats.sum(axis=0).tolist()
         total_trades = total_wins + total_losses + total_ties
         
         self.logger.info(f"🎯 Total Operaciones: {total_trades}")
@@ -1398,24 +2100,22 @@ class MultiAssetRSIBinaryOptionsStrategy:
         
         # Daily profit lock
         if self.daily_profit_lock:
-            self.logger.info(f"🔒 Daily Profit Lock: ACTIVO desde {self.daily_profit_lock_time.strftime('%H:%M')}")
+            self.logger.info(f"🔒 Daily Profit Lock: ACTIVO desde {_clock_time(self.daily_profit_lock_time, 'minutes')}")
         
         # Daily loss lock
         if self.daily_loss_lock:
-            self.logger.info(f"🔒 Daily Loss Lock: ACTIVO desde {self.daily_loss_lock_time.strftime('%H:%M')} ({self.daily_consecutive_losses} pérdidas)")
+            self.logger.info(f"🔒 Daily Loss Lock: ACTIVO desde {_clock_time(self.daily_loss_lock_time, 'minutes')} ({self.daily_consecutive_losses} pérdidas)")
         
-        # Estadísticas por activo
+        # Estadísticas por activo (todos los que operaron, también los que ya
+        # no están en TRADING_ASSETS pero vienen del archivo de estado)
         self.logger.info("\n📊 Estadísticas por Activo:")
-        for asset in self.trading_assets:
-            if asset in self.wins or asset in self.losses or asset in self.ties:
-                asset_wins = self.wins.get(asset, 0)
-                asset_losses = self.losses.get(asset, 0)
-                asset_ties = self.ties.get(asset, 0)
-                asset_total = asset_wins + asset_losses + asset_ties
-                if asset_total > 0:
-                    asset_wr = (asset_wins / (asset_wins + asset_losses) * 100) if (asset_wins + asset_losses) > 0 else 0
-                    cons_losses = self.consecutive_losses.get(asset, 0)
-                    self.logger.info(f"{asset}: {asset_total} trades | {asset_wins}W/{asset_losses}L/{asset_ties}T | {asset_wr:.1f}% éxito | Pérdidas consecutivas: {cons_losses}")
+        for asset, (asset_wins, asset_losses, asset_ties, cons_losses) in self._traded_assets():
+            asset_total = asset_wins + asset_losses + asset_ties
+            asset_wr = (asset_wins / (asset_wins + asset_losses) * 100) if (asset_wins + asset_losses) > 0 else 0
+            self.logger.info(
+                "%s: %d trades | %dW/%dL/%dT | %.1f%% éxito | Pérdidas consecutivas: %d",
+                asset, asset_total, asset_wins, asset_losses, asset_ties, asset_wr, cons_losses
+            )
         
         # Rendimiento mensual
         self.logger.info("\n📅 Rendimiento Mensual:")
@@ -1426,107 +2126,200 @@ class MultiAssetRSIBinaryOptionsStrategy:
         
         self.logger.info("=" * 60)
     
-    def run(self):
-        """Ejecutar la estrategia principal"""
+    def _log_run_banner(self):
+        """Mostrar la configuración al iniciar la ejecución"""
         self.logger.info("🚀 Iniciando estrategia ALGEBRA Multi-Activos (LÓGICA INVERTIDA)")
         self.logger.info(f"📊 Configuración: {len(self.valid_assets)} activos disponibles")
         self.logger.info("⚡ IMPORTANTE: PUT en RSI≤35 (sobreventa), CALL en RSI≥65 (sobrecompra)")
         self.logger.info(f"⏰ Tiempo entre señales: {self.min_time_between_signals} minutos (1 hora)")
         self.logger.info("🔄 Sin bloqueo por pérdidas consecutivas")
         self.logger.info(f"💰 Tamaño de posición: {self.position_size_percent*100}% del capital (sin límite máximo)")
+    
+    def _begin_cycle(self, cycle_count):
+        """
+        Verificaciones al inicio de cada ciclo
+        
+        Returns:
+            bool: True si se deben procesar los activos en este ciclo
+        """
+        # Hora del ciclo, calculada una sola vez y compartida por las verificaciones
+        now = datetime.now()
+        
+        # Log periódico
+        if cycle_count % 10 == 0:
+            self.logger.info("🔄 Ciclo #%d - %s", cycle_count, now.replace(microsecond=0))
+            
+            # Mostrar estado de calentamiento si aplica
+            remaining = (self._warmup_end_monotonic - time.monotonic()) / 60
+            if remaining > 0:
+                self.logger.info("⏳ Período de calentamiento: %.1f minutos restantes", remaining)
+            elif cycle_count == 10:  # Primera vez después del calentamiento
+                self.logger.info("✅ Período de calentamiento completado - Operaciones habilitadas")
+        
+        # Verificar conexión
+        if not self.iqoption.check_connect():
+            self.logger.warning("🔌 Reconectando...")
+            self._connect_to_iq_option(IQ_EMAIL, IQ_PASSWORD, ACCOUNT_TYPE)
+            self._stopping.wait(5)
+            return False
+        
+        # Verificar stop loss
+        if not self.check_stop_loss(now):
+            self.logger.info("🛑 Stop loss activo. Esperando...")
+            self._stopping.wait(300)  # Esperar 5 minutos (o hasta la parada)
+            return False
+        
+        # Verificar daily profit lock
+        if self.check_daily_profit_lock():
+            return False
+        
+        # Verificar daily loss lock
+        if self.check_daily_loss_lock():
+            return False
+        
+        # Verificar órdenes activas
+        self.check_active_orders(now.timestamp())
+        
+        # Verificar nuevo día (comparación numérica con la próxima medianoche)
+        if time.time() >= self._next_day_ts:
+            self.on_new_day()
+        
+        return True
+    
+    def poll_cycle(self, max_workers=8):
+        """
+        Procesar todos los activos de un ciclo con una sola consulta de velas
+        
+        Las velas de 5 minutos de todos los activos se leen en lote de los
+        streams ya suscritos; después los activos se procesan en un pool de
+        hilos. get_candles y buy comparten la sesión y se ejecutan de uno en
+        uno bajo sus locks (ver _serialized); el resto del trabajo por activo
+        se solapa.
+        """
+        assets = list(self.valid_assets)
+        self.cycle_candles = self.fetch_candles_batch(assets, 300, 100)
+        
+        if len(assets) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(assets))) as pool:
+                list(pool.map(self.process_asset, assets))
+        elif assets:
+            self.process_asset(assets[0])
+    
+    async def process_asset_async(self, asset, semaphore):
+        """Procesar un activo en un hilo, limitado por el semáforo del ciclo"""
+        async with semaphore:
+            await asyncio.to_thread(self.process_asset, asset)
+    
+    async def poll_cycle_async(self, max_concurrency=8):
+        """
+        Versión asíncrona de poll_cycle
+        
+        Las velas se siguen leyendo en lote una sola vez; después los activos
+        se procesan a la vez (como máximo `max_concurrency` en paralelo).
+        Igual que en poll_cycle, get_candles y buy se ejecutan de uno en uno
+        bajo los locks de la sesión.
+        """
+        assets = list(self.valid_assets)
+        self.cycle_candles = await asyncio.to_thread(self.fetch_candles_batch, assets, 300, 100)
+        
+        semaphore = asyncio.Semaphore(max_concurrency)
+        await asyncio.gather(*(self.process_asset_async(asset, semaphore) for asset in assets))
+    
+    def _end_cycle(self, cycle_count, cycle_start):
+        """
+        Tareas periódicas al final de cada ciclo
+        
+        Returns:
+            float: Segundos a esperar antes del siguiente ciclo
+        """
+        # Guardar estado periódicamente
+        if cycle_count % SAVE_STATE_INTERVAL == 0:
+            self.mark_state_dirty()
+        
+        # Re-verificar activos periódicamente
+        if cycle_count % 100 == 0:
+            self.logger.info("🔄 Re-verificando activos disponibles...")
+            self.check_valid_assets()
+        
+        # Control de tiempo del ciclo
+        cycle_duration = time.monotonic() - cycle_start
+        return max(5.0, 15.0 - cycle_duration)  # Mínimo 5 segundos entre ciclos
+    
+    def _finalize_run(self):
+        """Guardar estado y mostrar resumen"""
+        self.logger.info("🏁 Finalizando estrategia...")
+        self._stopping.set()  # Antes que nada: ningún hilo del ciclo coloca ya órdenes
+        self._unlock_event.set()  # No dejar un hilo esperando a la medianoche
+        self._wake.set()
+        self.save_state()
+        self.print_summary()
+        
+        self.logger.info("👋 Estrategia finalizada")
+    
+    def run(self):
+        """Ejecutar la estrategia principal"""
+        self._log_run_banner()
         
         cycle_count = 0
         
         try:
             while True:
-                cycle_start = time.time()
+                cycle_start = time.monotonic()
                 cycle_count += 1
                 
-                # Log periódico
-                if cycle_count % 10 == 0:
-                    self.logger.info(f"🔄 Ciclo #{cycle_count} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                    
-                    # Mostrar estado de calentamiento si aplica
-                    if time.time() < self.warmup_end_time:
-                        remaining = (self.warmup_end_time - time.time()) / 60
-                        self.logger.info(f"⏳ Período de calentamiento: {remaining:.1f} minutos restantes")
-                    elif cycle_count == 10:  # Primera vez después del calentamiento
-                        self.logger.info("✅ Período de calentamiento completado - Operaciones habilitadas")
-                
-                # Verificar conexión
-                if not self.iqoption.check_connect():
-                    self.logger.warning("🔌 Reconectando...")
-                    self._connect_to_iq_option(IQ_EMAIL, IQ_PASSWORD, ACCOUNT_TYPE)
-                    time.sleep(5)
-                    continue
-                
-                # Verificar stop loss
-                if not self.check_stop_loss():
-                    self.logger.info("🛑 Stop loss activo. Esperando...")
-                    time.sleep(300)  # Esperar 5 minutos
+                if not self._begin_cycle(cycle_count):
                     continue
                 
-                # Verificar daily profit lock
-                if self.check_daily_profit_lock():
-                    continue
-                
-                # Verificar daily loss lock
-                if self.check_daily_loss_lock():
-                    continue
+                # Procesar todos los activos disponibles
+                self.poll_cycle()
                 
-                # Verificar órdenes activas
-                self.check_active_orders()
+                self._wait_next_cycle(self._end_cycle(cycle_count, cycle_start))
                 
-                # Verificar nuevo día
-                current_date = datetime.now().date()
-                if self.last_date != current_date:
-                    self.on_new_day()
-                
-                # Procesar cada activo disponible
-                for asset in self.valid_assets:
-                    try:
-                        self.process_asset(asset)
-                    except Exception as e:
-                        self.logger.error(f"❌ Error procesando {asset}: {str(e)}")
+        except KeyboardInterrupt:
+            self.logger.info("⏹️ Estrategia detenida por el usuario")
+        except Exception as e:
+            self.logger.critical("🚨 Error crítico: %s", e, exc_info=True)
+        finally:
+            self._finalize_run()
+    
+    async def run_async(self):
+        """
+        Ejecutar la estrategia principal con asyncio
+        
+        Igual que run(), pero el trabajo bloqueante corre en hilos para no
+        bloquear el event loop, y los activos de cada ciclo se procesan
+        concurrentemente sobre las velas obtenidas en lote (poll_cycle_async).
+        
+        Al cancelarse (Ctrl+C) los hilos no se interrumpen: _finalize_run
+        activa _stopping y los eventos de espera, así las pausas largas de
+        los hilos terminan enseguida y ninguno coloca órdenes que ya no se
+        registrarían.
+        """
+        self._log_run_banner()
+        
+        cycle_count = 0
+        
+        try:
+            while True:
+                cycle_start = time.monotonic()
+                cycle_count += 1
                 
-                # Guardar estado periódicamente
-                if cycle_count % SAVE_STATE_INTERVAL == 0:
-                    self.save_state()
+                if not await asyncio.to_thread(self._begin_cycle, cycle_count):
+                    continue
                 
-                # Re-verificar activos periódicamente
-                if cycle_count % 100 == 0:
-                    self.logger.info("🔄 Re-verificando activos disponibles...")
-                    self.check_valid_assets()
+                # Procesar todos los activos disponibles a la vez
+                await self.poll_cycle_async()
                 
-                # Control de tiempo del ciclo
-                cycle_duration = time.time() - cycle_start
-                sleep_time = max(5.0, 15.0 - cycle_duration)  # Mínimo 5 segundos entre ciclos
-                time.sleep(sleep_time)
+                sleep_time = await asyncio.to_thread(self._end_cycle, cycle_count, cycle_start)
+                await asyncio.to_thread(self._wait_next_cycle, sleep_time)
                 
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, asyncio.CancelledError):
             self.logger.info("⏹️ Estrategia detenida por el usuario")
         except Exception as e:
-            self.logger.critical(f"🚨 Error crítico: {str(e)}")
-            self.logger.critical(traceback.format_exc())
+            self.logger.critical("🚨 Error crítico: %s", e, exc_info=True)
         finally:
-            self.logger.info("🏁 Finalizando estrategia...")
-            self.save_state()
-            self.print_summary()
-            
-            # Cerrar executor
-            if hasattr(self, 'executor'):
-                self.executor.shutdown(wait=True)
-            
-            self.logger.info("👋 Estrategia finalizada")
+            self._finalize_run()
     
-    def __del__(self):
-        """Limpieza al destruir el objeto"""
-        try:
-            if hasattr(self, 'executor'):
-                self.executor.shutdown(wait=False)
-        except:
-            pass
-
 
 # Alias para compatibilidad con main.py
 MultiCurrencyRSIBinaryOptionsStrategy = MultiAssetRSIBinaryOptionsStrategy
\ No newline at end of file
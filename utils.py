@@ -1,13 +1,55 @@
 # utils.py
 # Funciones auxiliares para la estrategia
 
+import os
+import gzip
+import mmap
+import time
+import json
+import queue
+import atexit
+import threading
+from functools import lru_cache
 import numpy as np
 from datetime import datetime
-import pytz
 import logging
+import logging.handlers
+
+try:
+    from numba import njit
+except ImportError:  # Numba es opcional: sin él se usa el bucle en Python
+    njit = None
+
+try:
+    # Núcleo del RSI compilado de antemano con build_rsi_aot.py (sin calentamiento JIT)
+    from _rsi_aot import wilder_smooth as _wilder_smooth_aot
+except ImportError:
+    _wilder_smooth_aot = None
+
+try:
+    from _rsi_aot import rsi_core as _rsi_core_aot
+except ImportError:  # Extensiones compiladas antes de añadir rsi_core
+    _rsi_core_aot = None
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa json estándar
+    orjson = None
 
 def setup_logger(name, log_file, level=logging.INFO):
-    """Configurar logger con formato personalizado"""
+    """
+    Configurar logger con formato personalizado
+    
+    El logger solo encola los registros (QueueHandler); un hilo
+    (QueueListener, en logger.queue_listener) los escribe en archivo y
+    consola, así el bucle de trading no espera a la escritura en disco.
+    Al salir del programa se vacía la cola.
+    """
+    # El formato no usa hilo ni proceso: no rellenarlos en cada registro
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    
     formatter = logging.Formatter(
         '%(asctime)s | %(levelname)s | %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
@@ -21,63 +63,375 @@ def setup_logger(name, log_file, level=logging.INFO):
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
     
+    # Escritura en segundo plano
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)  # Escribir lo pendiente antes de terminar
+    
     # Configurar logger
     logger = logging.getLogger(name)
     logger.setLevel(level)
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.queue_listener = listener
     
     return logger
 
+def _wilder_smooth_py(values, period):
+    """
+    Promedio suavizado de Wilder
+    
+    Semilla con la media simple de los primeros `period` valores y luego
+    avg = (avg * (period - 1) + x) / period para cada valor siguiente.
+    
+    Returns:
+        np.ndarray: Un promedio por cada valor desde el índice period - 1
+    """
+    out = np.empty(len(values) - period + 1)
+    avg = values[:period].sum() / period
+    out[0] = avg
+    for i in range(period, len(values)):
+        avg = (avg * (period - 1) + values[i]) / period
+        out[i - period + 1] = avg
+    return out
+
+def _wilder_last_np(values, period):
+    """
+    Último promedio de Wilder sin recorrer la recursión en Python
+    
+    Desarrollando avg = a * avg + x / period (a = (period - 1) / period),
+    el valor final es semilla * a^n + sum(x_i * a^(n-1-i)) / period,
+    un producto escalar que NumPy resuelve en C.
+    """
+    a = (period - 1) / period
+    rest = values[period:]
+    n = len(rest)
+    weights = a ** np.arange(n - 1, -1, -1)
+    return values[:period].sum() / period * a ** n + (rest @ weights) / period
+
+# Preferir la versión AOT, luego la JIT de Numba y por último Python puro
+if _wilder_smooth_aot is not None:
+    _wilder_smooth = _wilder_smooth_aot
+elif njit is not None:
+    _wilder_smooth = njit(cache=True, fastmath=True)(_wilder_smooth_py)
+else:
+    _wilder_smooth = _wilder_smooth_py
+
+def _rsi_core_py(closes, period):
+    """
+    RSI final (sin redondear) recorriendo los cierres una sola vez
+    
+    Calcula cada cambio de precio y actualiza a la vez los promedios de
+    ganancia y pérdida de Wilder, sin arrays intermedios. Pensado para
+    compilarse con Numba; en Python puro se usa la ruta vectorizada.
+    """
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, period + 1):
+        delta = closes[i] - closes[i - 1]
+        if delta > 0:
+            avg_gain += delta
+        else:
+            avg_loss -= delta
+    avg_gain /= period
+    avg_loss /= period
+    
+    for i in range(period + 1, len(closes)):
+        delta = closes[i] - closes[i - 1]
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+    
+    if avg_loss == 0:
+        return 100.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+if _rsi_core_aot is not None:
+    _rsi_core = _rsi_core_aot
+elif njit is not None:
+    _rsi_core = njit(cache=True, fastmath=True)(_rsi_core_py)
+    _rsi_core(np.arange(16, dtype=np.float64), 14)  # Compilar (o cargar de caché) al importar
+else:
+    _rsi_core = None
+
+# Para el valor final: bucle compilado si existe, si no la forma cerrada vectorizada
+if _wilder_smooth is _wilder_smooth_py:
+    _wilder_last = _wilder_last_np
+else:
+    def _wilder_last(values, period):
+        return _wilder_smooth(values, period)[-1]
+
 def calculate_rsi(candles, period=14):
     """
     Calcular RSI a partir de velas
     
     Args:
-        candles: Lista de velas con formato IQ Option
+        candles: Lista de velas con formato IQ Option, o directamente un
+            array/secuencia de precios de cierre
         period: Período para el cálculo del RSI
     
     Returns:
         float: Valor del RSI o None si no hay suficientes datos
     """
-    if not candles or len(candles) < period + 1:
+    if candles is None or len(candles) < period + 1:
         return None
     
     try:
-        # Extraer precios de cierre
-        closes = [float(candle['close']) for candle in candles]
-        
-        # Calcular cambios de precio
-        price_changes = []
-        for i in range(1, len(closes)):
-            price_changes.append(closes[i] - closes[i-1])
-        
-        # Separar ganancias y pérdidas
-        gains = [change if change > 0 else 0 for change in price_changes]
-        losses = [-change if change < 0 else 0 for change in price_changes]
+        # Extraer precios de cierre (sin copia si ya es un array de precios)
+        if isinstance(candles, np.ndarray) or not isinstance(candles[0], dict):
+            closes = np.asarray(candles, dtype=np.float64)
+        else:
+            closes = np.fromiter((candle['close'] for candle in candles), dtype=np.float64, count=len(candles))
         
-        # Calcular promedios iniciales
-        avg_gain = sum(gains[:period]) / period
-        avg_loss = sum(losses[:period]) / period
-        
-        # Aplicar suavizado exponencial
-        for i in range(period, len(gains)):
-            avg_gain = (avg_gain * (period - 1) + gains[i]) / period
-            avg_loss = (avg_loss * (period - 1) + losses[i]) / period
-        
-        # Calcular RSI
-        if avg_loss == 0:
-            return 100
-        
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return round(rsi, 2)
+        # Solo hace falta el valor final: no se construye la serie completa
+        if _rsi_core is not None:
+            return round(float(_rsi_core(closes, period)), 2)
+        return rsi_from_averages(*wilder_averages(closes, period))
         
     except Exception as e:
         logging.error(f"Error calculando RSI: {str(e)}")
         return None
 
+def wilder_averages(closes, period=14):
+    """
+    Promedios de ganancia y pérdida de Wilder tras el último cierre
+    
+    Sirve de semilla para actualizar el RSI vela a vela con update_wilder_averages.
+    
+    Args:
+        closes: Secuencia de precios de cierre (al menos period + 1)
+        period: Período para el cálculo del RSI
+    
+    Returns:
+        tuple: (avg_gain, avg_loss)
+    """
+    deltas = np.diff(np.asarray(closes, dtype=np.float64))
+    avg_gain = _wilder_last(np.maximum(deltas, 0.0), period)
+    avg_loss = _wilder_last(np.maximum(-deltas, 0.0), period)
+    return float(avg_gain), float(avg_loss)
+
+def update_wilder_averages(avg_gain, avg_loss, change, period=14):
+    """
+    Aplicar un paso del suavizado de Wilder con un nuevo cambio de precio (O(1))
+    
+    Returns:
+        tuple: (avg_gain, avg_loss) actualizados
+    """
+    gain = change if change > 0 else 0.0
+    loss = -change if change < 0 else 0.0
+    return (
+        (avg_gain * (period - 1) + gain) / period,
+        (avg_loss * (period - 1) + loss) / period
+    )
+
+def rsi_from_averages(avg_gain, avg_loss):
+    """
+    Calcular el RSI a partir de los promedios de Wilder
+    
+    Returns:
+        float: Valor del RSI redondeado a 2 decimales
+    """
+    if avg_loss == 0:
+        return 100.0
+    return round(100 - (100 / (1 + avg_gain / avg_loss)), 2)
+
+# Caché en memoria por instancia de IQ_Option: id(iq) -> {"t": timestamp, "v": valor}
+_open_time_cache = {}
+_opcode_update_cache = {}
+
+def cached_open_times(iq, ttl=60):
+    """
+    Obtener get_all_open_time() con caché de lectura (read-through)
+    
+    El estado de apertura de los activos solo cambia entre sesiones, así que
+    se reutiliza la última respuesta poblada durante `ttl` segundos.
+    
+    Args:
+        iq: Instancia conectada de IQ_Option
+        ttl: Segundos de validez de la caché
+    
+    Returns:
+        dict: Estado de los activos por tipo de opción
+    """
+    entry = _open_time_cache.get(id(iq))
+    now = time.time()
+    if entry and now - entry["t"] < ttl:
+        return entry["v"]
+    
+    all_assets = iq.get_all_open_time()
+    # Solo cachear respuestas con datos
+    if all_assets and any(all_assets.get(t) for t in ("binary", "turbo", "digital")):
+        _open_time_cache[id(iq)] = {"t": now, "v": all_assets}
+    return all_assets
+
+def cached_update_opcodes(iq, ttl=60):
+    """
+    Ejecutar update_ACTIVES_OPCODE() como máximo una vez cada `ttl` segundos
+    
+    Args:
+        iq: Instancia conectada de IQ_Option
+        ttl: Segundos entre actualizaciones reales
+    """
+    now = time.time()
+    if now - _opcode_update_cache.get(id(iq), 0) < ttl:
+        return
+    
+    iq.update_ACTIVES_OPCODE()
+    _opcode_update_cache[id(iq)] = now
+
+def _json_default(obj):
+    """Serializar tipos que json estándar no conoce (numpy, fechas)"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+def json_dumps(obj, indent=False):
+    """
+    Serializar a JSON (bytes UTF-8) usando orjson si está disponible
+    
+    Acepta valores numpy y datetime/date, y claves no str (p. ej. ids int).
+    
+    Args:
+        obj: Objeto a serializar
+        indent: Si True, indentar la salida para que sea legible
+    
+    Returns:
+        bytes: Documento JSON
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_json_default, option=option)
+    return json.dumps(
+        obj, indent=2 if indent else None, ensure_ascii=False, default=_json_default
+    ).encode("utf-8")
+
+def json_loads(data):
+    """
+    Parsear un documento JSON (bytes o str) usando orjson si está disponible
+    
+    Args:
+        data: Documento JSON
+    
+    Returns:
+        Objeto deserializado
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+def write_json_atomic(path, obj, indent=False, compress=False):
+    """
+    Escribir un JSON de forma atómica
+    
+    Escribe en un archivo temporal, hace fsync y lo renombra con os.replace,
+    así quien lea el archivo nunca ve un estado a medio escribir.
+    
+    Args:
+        path: Ruta del archivo destino
+        obj: Objeto a serializar
+        indent: Si True, indentar la salida para que sea legible
+        compress: Si True, comprimir con gzip (nivel 1, prioriza velocidad)
+    """
+    data = json_dumps(obj, indent=indent)
+    if compress:
+        data = gzip.compress(data, compresslevel=1)
+    
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def read_json_file(path):
+    """
+    Leer un JSON mapeando el archivo en memoria (sin copiarlo a un buffer con orjson)
+    
+    Los archivos comprimidos con gzip se detectan por su cabecera, así que
+    un backup .json.gz copiado como archivo de estado se lee igual.
+    
+    Args:
+        path: Ruta del archivo
+    
+    Returns:
+        Objeto deserializado
+    """
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:2] == GZIP_MAGIC:
+                return json_loads(gzip.decompress(mm))
+            if orjson is not None:
+                with memoryview(mm) as view:
+                    return orjson.loads(view)
+            return json.loads(mm[:])
+
+# Hilos de run_with_timeout vivos a la vez, contando los abandonados por timeout
+_MAX_TIMED_CALLS = 8
+_timed_call_slots = threading.BoundedSemaphore(_MAX_TIMED_CALLS)
+
+def run_with_timeout(func, args=(), kwargs=None, timeout=None):
+    """
+    Ejecutar una función esperando como máximo `timeout` segundos
+    
+    La llamada corre en un hilo daemon que avisa con un Event al terminar;
+    si se agota el tiempo, el hilo se abandona sin bloquear a nadie. Un
+    hilo abandonado sigue ocupando su plaza hasta que la función termina,
+    así que como mucho hay _MAX_TIMED_CALLS a la vez (algunas llamadas de
+    iqoptionapi esperan en bucle activo); el tiempo esperando plaza cuenta
+    dentro del timeout.
+    
+    Args:
+        func: Función a ejecutar
+        args: Argumentos posicionales
+        kwargs: Argumentos con nombre
+        timeout: Segundos máximos de espera (None = sin límite)
+    
+    Returns:
+        El resultado de func
+    
+    Raises:
+        TimeoutError: Si func no termina a tiempo (o la excepción de func)
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    if not _timed_call_slots.acquire(timeout=timeout):
+        raise TimeoutError(f"{getattr(func, '__name__', func)}: sin hilo libre en {timeout}s")
+    
+    done = threading.Event()
+    outcome = [None, None]  # [resultado, excepción]
+    
+    def target():
+        try:
+            outcome[0] = func(*args, **(kwargs or {}))
+        except BaseException as e:
+            outcome[1] = e
+        finally:
+            _timed_call_slots.release()
+            done.set()
+    
+    try:
+        threading.Thread(target=target, daemon=True).start()
+    except BaseException:
+        _timed_call_slots.release()
+        raise
+    
+    remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+    if not done.wait(remaining):
+        raise TimeoutError(f"{getattr(func, '__name__', func)} excedió {timeout}s")
+    if outcome[1] is not None:
+        raise outcome[1]
+    return outcome[0]
+
 def is_market_open():
     """
     Verificar si el mercado Forex está abierto
@@ -103,17 +457,22 @@ def get_iqoption_pair_mapping(pair_name):
     # IQ Option usa nombres en mayúsculas para forex
     return pair_name.upper()
 
-def format_currency(amount):
+_CURRENCY_FORMAT = "${:,.2f}".format
+_SIGNED_CURRENCY_FORMAT = "${:+,.2f}".format
+
+@lru_cache(maxsize=1024)
+def format_currency(amount, signed=False):
     """
-    Formatear cantidad como moneda
+    Formatear cantidad como moneda (los importes se repiten mucho: se cachean)
     
     Args:
         amount: Cantidad a formatear
+        signed: Mostrar siempre el signo (p. ej. $+12.50 para diferencias)
     
     Returns:
         str: Cantidad formateada
     """
-    return f"${amount:,.2f}"
+    return _SIGNED_CURRENCY_FORMAT(amount) if signed else _CURRENCY_FORMAT(amount)
 
 def calculate_win_rate(wins, losses):
     """
@@ -169,13 +528,14 @@ def validate_forex_pairs(pairs, available_assets):
     Returns:
         list: Lista de pares válidos
     """
+    # Un solo set para que cada comprobación sea O(1) aunque llegue una lista
+    available = available_assets if isinstance(available_assets, (set, frozenset, dict)) else set(available_assets)
+    
     valid_pairs = []
     for pair in pairs:
-        # Verificar versión estándar
-        if pair.upper() in available_assets:
-            valid_pairs.append(pair)
-        # Verificar versión OTC
-        elif f"{pair.upper()}-OTC" in available_assets:
+        name = pair.upper()
+        # Verificar versión estándar y luego la OTC
+        if name in available or f"{name}-OTC" in available:
             valid_pairs.append(pair)
     
     return valid_pairs
\ No newline at end of file
@@ -12,6 +12,8 @@ class OrderTracker:
     def __init__(self, iq):
         self.iq = iq
         self.orders = {}  # Almacenar órdenes activas
+        self._listinfo_index = {}  # id -> registro de api.listinfodata
+        self._listinfo_size = None  # Nº de registros cuando se construyó el índice
         
     def add_order(self, order_id, amount, asset, direction):
         """Registrar una nueva orden"""
@@ -76,14 +78,28 @@ class OrderTracker:
         return result
         
     def _find_in_listinfodata(self, order_id):
-        """Buscar orden en listinfodata"""
-        if hasattr(self.iq.api, 'listinfodata') and isinstance(self.iq.api.listinfodata, dict):
-            for key, value in self.iq.api.listinfodata.items():
+        """
+        Buscar orden en listinfodata
+        
+        Usa un índice id -> registro que solo se reconstruye (una pasada por
+        todos los registros) cuando la orden no está o cambió el contenido.
+        """
+        if not (hasattr(self.iq.api, 'listinfodata') and isinstance(self.iq.api.listinfodata, dict)):
+            return None
+        
+        listinfodata = self.iq.api.listinfodata
+        size = sum(len(value) for value in listinfodata.values() if isinstance(value, list))
+        if order_id not in self._listinfo_index or size != self._listinfo_size:
+            index = {}
+            for value in listinfodata.values():
                 if isinstance(value, list):
                     for item in value:
-                        if isinstance(item, dict) and item.get('id') == order_id:
-                            return item
-        return None
+                        if isinstance(item, dict):
+                            index.setdefault(item.get('id'), item)
+            self._listinfo_index = index
+            self._listinfo_size = size
+        
+        return self._listinfo_index.get(order_id)
 
 # PRUEBA
 print("🧪 SOLUCIÓN FUNCIONAL - SIN DEPENDENCIA DE get_position_history")
@@ -122,10 +138,8 @@ if check:
     tracker.check_order_result(order_id)
     
     # Esperar a que expire
-    print("\n⏳ Esperando 75 segundos...")
-    for i in range(75, 0, -5):
-        print(f"   {i}s...", end="\r")
-        time.sleep(5)
+    print(f"\n⏳ Esperando 75 segundos (hasta las {datetime.fromtimestamp(time.time() + 75).time().isoformat(timespec='seconds')})...")
+    time.sleep(75)
     
     # Verificar resultado final
     print("\n\n🔍 Verificación final:")